@@ -1,6 +1,18 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from chart_data import bin_values
+
+
+def plot_bins(binned, figsize=(8, 4)):
+    plt.figure(figsize=figsize)
+    plt.bar(
+        binned["bin_start"],
+        binned["count"],
+        width=binned["bin_end"] - binned["bin_start"],
+        align="edge"
+    )
+
 # -----------------------------
 # LOAD DATA
 # -----------------------------
@@ -85,7 +97,7 @@ plt.show()
 # 6️⃣ RANKINGS ANALYSIS
 # -----------------------------
 if "points" in rankings.columns:
-    rankings["points"].hist(bins=20, figsize=(8, 4))
+    plot_bins(bin_values(rankings["points"], bins=20))
     plt.title("Distribution of Player Points")
     plt.xlabel("Points")
     plt.ylabel("Frequency")
@@ -93,7 +105,7 @@ if "points" in rankings.columns:
     plt.show()
 
 if "competitions_played" in rankings.columns:
-    rankings["competitions_played"].hist(bins=20, figsize=(8, 4))
+    plot_bins(bin_values(rankings["competitions_played"], bins=20))
     plt.title("Distribution of Competitions Played")
     plt.xlabel("Competitions Played")
     plt.ylabel("Frequency")
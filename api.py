@@ -0,0 +1,414 @@
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from aiohttp import web
+
+import data_store
+import search_index
+import tennis_views as views
+from player_bridge import PLAYER_COLUMNS, PlayerBridge
+from shared_data import SharedDatasets
+
+# =========================
+# CONFIGURATION
+# =========================
+API_HOST = os.getenv("TENNIS_API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("TENNIS_API_PORT", "8080"))
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+CACHE_MAX_ENTRIES = 4096
+VERSION_CHECK_SECONDS = 1.0
+GZIP_MIN_BYTES = 1024
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# =========================
+# DATA PER VERSION
+# =========================
+class VersionData:
+    # Everything a request needs, derived once per data version
+
+    def __init__(self, version):
+        self.version = version
+        self.shared = SharedDatasets(version, data_store.load_version(version))
+
+        table = views.competitor_table(self.shared["competitors"], self.shared["rankings"])
+        self.competitors = table
+        self.by_rank = views.ranked_order(table)
+        self.by_points = views.points_order(table)
+        self.by_id = table.set_index("competitor_id", drop=False)
+        self.bridge = PlayerBridge(self.shared["players"], self.shared["team_players"],
+                                   self.shared["competitors"], self.shared["rankings"])
+
+        self._index = None
+        self._index_lock = threading.Lock()
+
+    @property
+    def index(self):
+        with self._index_lock:
+            if self._index is None:
+                self._index = search_index.load_index(self.version, self.shared.datasets)
+            return self._index
+
+
+class DataVersions:
+
+    def __init__(self):
+        self.loaded = OrderedDict()
+        self.current_version = None
+        self.checked_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def current(self):
+        # The pointer file is re-read at most once per VERSION_CHECK_SECONDS
+        now = time.monotonic()
+        if now - self.checked_at > VERSION_CHECK_SECONDS or self.current_version not in self.loaded:
+            self.current_version = data_store.current_version()
+            self.checked_at = now
+
+        version = self.current_version
+        if version in self.loaded:
+            return self.loaded[version]
+
+        # One loader per version, however many requests arrive meanwhile
+        async with self.lock:
+            if version not in self.loaded:
+                loop = asyncio.get_running_loop()
+                self.loaded[version] = await loop.run_in_executor(None, VersionData, version)
+                while len(self.loaded) > data_store.KEEP_VERSIONS:
+                    self.loaded.popitem(last=False)
+
+        return self.loaded[version]
+
+
+# =========================
+# RESPONSE CACHE
+# =========================
+class CachedResponse:
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+
+
+class ResponseCache:
+    # Keys include the data version, so a swap never serves stale results
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+# =========================
+# QUERY HELPERS
+# =========================
+def int_param(query, name, default=None, minimum=None, maximum=None):
+    raw = query.get(name)
+    if raw in (None, ""):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer")
+    if minimum is not None and value < minimum:
+        raise ApiError(400, f"'{name}' must be >= {minimum}")
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+def limit_param(query):
+    return int_param(query, "limit", DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT)
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, columns):
+    # columns: the key columns the cursor must match, in order
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise ApiError(400, "Invalid 'after' cursor")
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ApiError(400, "Invalid 'after' cursor")
+
+    for value, col in zip(values, columns):
+        numeric = col.dtype.kind in "iuf"
+        is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if numeric != is_number or (not numeric and not isinstance(value, str)):
+            raise ApiError(400, "Invalid 'after' cursor")
+
+    return values
+
+
+def keyset_page(df, order, after, limit):
+    # df must already be sorted by order; rows strictly after the cursor
+    keys, ascending = order
+
+    if after:
+        values = decode_cursor(after, [df[key] for key in keys])
+
+        mask = None
+        equal = None
+        for key, asc, value in zip(keys, ascending, values):
+            col = df[key]
+            beyond = (col > value) if asc else (col < value)
+            step = beyond if equal is None else (equal & beyond)
+            mask = step if mask is None else (mask | step)
+            equal = (col == value) if equal is None else (equal & (col == value))
+        df = df[mask]
+
+    page = df.head(limit + 1)
+    next_cursor = None
+    if len(page) > limit:
+        page = page.head(limit)
+        last = page.iloc[-1]
+        next_cursor = encode_cursor([last[k].item() if hasattr(last[k], "item") else last[k]
+                                     for k in keys])
+
+    return page, next_cursor
+
+
+def json_body(version, data, next_cursor=None):
+    # DataFrames go straight through to_json; no intermediate dicts
+    data_json = data.to_json(orient="records") if hasattr(data, "to_json") else json.dumps(data)
+    return (
+        '{"version":' + json.dumps(version) +
+        ',"next":' + json.dumps(next_cursor) +
+        ',"data":' + data_json + '}'
+    ).encode("utf-8")
+
+
+COMPETITOR_COLUMNS = ["competitor_id", "name", "country", "country_code",
+                      "rank", "movement", "points", "competitions_played"]
+
+# Ingestion already stores players in this order
+PLAYERS_ORDER = (["total_points", "player_id"], [False, True])
+
+
+# =========================
+# VIEWS
+# =========================
+def leaderboard(ordered, order):
+    def view(data, request):
+        query = request.query
+        df = getattr(data, ordered)
+        if query.get("country"):
+            df = df[df["country"] == query["country"]]
+        page, next_cursor = keyset_page(df, order, query.get("after"), limit_param(query))
+        return json_body(data.version, page[COMPETITOR_COLUMNS], next_cursor)
+    return view
+
+
+def competitors_view(data, request):
+    query = request.query
+    min_rank = int_param(query, "min_rank", 1)
+    max_rank = int_param(query, "max_rank")
+
+    df = views.search_competitors(
+        data.by_rank,
+        player=query.get("name", "All"),
+        country=query.get("country", "All"),
+        rank_range=(min_rank, max_rank) if max_rank is not None else None,
+        min_points=int_param(query, "min_points", 0)
+    )
+    if max_rank is None:
+        df = df[df["rank"] >= min_rank]
+
+    page, next_cursor = keyset_page(df, views.RANKED_ORDER, query.get("after"), limit_param(query))
+    return json_body(data.version, page[COMPETITOR_COLUMNS], next_cursor)
+
+
+def competitor_view(data, request):
+    competitor_id = request.match_info["competitor_id"]
+    if competitor_id not in data.by_id.index:
+        raise ApiError(404, f"Competitor '{competitor_id}' not found")
+    row = data.by_id.loc[[competitor_id], COMPETITOR_COLUMNS]
+    return json_body(data.version, row)
+
+
+def players_view(data, request):
+    query = request.query
+    page, next_cursor = keyset_page(data.shared["players"], PLAYERS_ORDER,
+                                    query.get("after"), limit_param(query))
+    return json_body(data.version, page[PLAYER_COLUMNS], next_cursor)
+
+
+def _player_id(data, request):
+    player_id = request.match_info["player_id"]
+    if player_id not in data.bridge:
+        raise ApiError(404, f"Player '{player_id}' not found")
+    return player_id
+
+
+def player_view(data, request):
+    player_id = _player_id(data, request)
+    return json_body(data.version, data.bridge.players.loc[[player_id], PLAYER_COLUMNS])
+
+
+def player_teams_view(data, request):
+    teams = data.bridge.player_teams(_player_id(data, request))
+    return json_body(data.version, teams[["competitor_id", "name", "partners", "country",
+                                          "rank", "points"]])
+
+
+def countries_view(data, request):
+    return json_body(data.version, data.shared["agg_country_summary"])
+
+
+def categories_view(data, request):
+    return json_body(data.version, data.shared["agg_category_counts"])
+
+
+def search_view(data, request):
+    query = request.query
+    results = data.index.search(
+        query.get("q", ""),
+        limit=limit_param(query),
+        doc_type=query.get("doc_type"),
+        type=query.get("type"),
+        gender=query.get("gender"),
+        category_id=query.get("category_id")
+    )
+    return json_body(data.version, results[["doc_type", "doc_id", "name", "type",
+                                             "gender", "category_id", "score"]])
+
+
+# (path, view, query params that affect the result)
+ROUTES = [
+    ("/v1/leaderboards/ranked", leaderboard("by_rank", views.RANKED_ORDER),
+     ("country", "limit", "after")),
+    ("/v1/leaderboards/points", leaderboard("by_points", views.POINTS_ORDER),
+     ("country", "limit", "after")),
+    ("/v1/competitors", competitors_view,
+     ("name", "country", "min_rank", "max_rank", "min_points", "limit", "after")),
+    ("/v1/competitors/{competitor_id}", competitor_view, ()),
+    ("/v1/players", players_view, ("limit", "after")),
+    ("/v1/players/{player_id}", player_view, ()),
+    ("/v1/players/{player_id}/teams", player_teams_view, ()),
+    ("/v1/countries", countries_view, ()),
+    ("/v1/categories", categories_view, ()),
+    ("/v1/competitions/search", search_view,
+     ("q", "doc_type", "type", "gender", "category_id", "limit"))
+]
+
+
+# =========================
+# HTTP LAYER
+# =========================
+def respond(request, entry, version):
+    headers = {
+        "ETag": entry.etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=60",
+        "X-Data-Version": version or "baseline"
+    }
+
+    if entry.etag in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+
+    body = entry.body
+    if entry.gzipped is not None and "gzip" in request.headers.get("Accept-Encoding", ""):
+        body = entry.gzipped
+        headers["Content-Encoding"] = "gzip"
+
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+def cached_handler(view, params):
+    async def handler(request):
+        app = request.app
+        data = await app["versions"].current()
+
+        key = (
+            data.version,
+            request.path,
+            tuple((p, request.query[p]) for p in params if p in request.query)
+        )
+
+        entry = app["cache"].get(key)
+        if entry is None:
+            try:
+                entry = CachedResponse(view(data, request))
+            except ApiError as exc:
+                return web.json_response({"error": exc.message}, status=exc.status)
+            app["cache"].put(key, entry)
+
+        return respond(request, entry, data.version)
+
+    return handler
+
+
+async def health(request):
+    cache = request.app["cache"]
+    data = await request.app["versions"].current()
+    return web.json_response({
+        "status": "ok",
+        "version": data.version,
+        "cache_entries": len(cache.entries),
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses
+    })
+
+
+def create_app():
+    app = web.Application()
+    app["versions"] = DataVersions()
+    app["cache"] = ResponseCache()
+
+    app.router.add_get("/health", health)
+    for path, view, params in ROUTES:
+        app.router.add_get(path, cached_handler(view, params))
+
+    return app
+
+
+# =========================
+# RUN
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only JSON API over the tennis datasets")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    web.run_app(create_app(), host=args.host, port=args.port, access_log=None)
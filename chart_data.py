@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# CHART DATA LAYER
+# =========================
+# Charts only ever receive pre-aggregated series from here, so the
+# Vega-Lite spec (and matplotlib) never sees the raw per-row data.
+
+MAX_CHART_ROWS = 500
+DEFAULT_BINS = 20
+DEFAULT_TOP_N = 10
+OTHER_LABEL = "Other"
+
+
+# -------------------------
+# BINNING
+# -------------------------
+def bin_values(values, bins=DEFAULT_BINS):
+    arr = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    arr = arr[np.isfinite(arr)]
+
+    if arr.size == 0:
+        return pd.DataFrame({"bin_start": [], "bin_end": [], "count": []})
+
+    counts, edges = np.histogram(arr, bins=min(bins, MAX_CHART_ROWS))
+
+    return pd.DataFrame({
+        "bin_start": edges[:-1],
+        "bin_end": edges[1:],
+        "count": counts
+    })
+
+
+# -------------------------
+# TOP-N + "OTHER" BUCKET
+# -------------------------
+def top_n_with_other(labels, values=None, n=DEFAULT_TOP_N,
+                     label_name="label", value_name="value",
+                     other_label=OTHER_LABEL):
+    labels = pd.Series(labels).astype(str).to_numpy()
+    n = min(n, MAX_CHART_ROWS - 1)
+
+    uniques, inverse = np.unique(labels, return_inverse=True)
+    weights = None if values is None else \
+        pd.to_numeric(pd.Series(values), errors="coerce").fillna(0).to_numpy(dtype=float)
+    totals = np.bincount(inverse, weights=weights, minlength=len(uniques))
+
+    order = np.argsort(-totals, kind="stable")
+    keep, rest = order[:n], order[n:]
+
+    out_labels = uniques[keep].tolist()
+    out_values = totals[keep].tolist()
+
+    if rest.size:
+        out_labels.append(other_label)
+        out_values.append(totals[rest].sum())
+
+    return pd.DataFrame({label_name: out_labels, value_name: out_values})
@@ -0,0 +1,218 @@
+import pandas as pd
+
+# =========================
+# STRUCTURED COMPETITION FIELDS
+# =========================
+# competition_name packs tour, city, country and draw into free text,
+# e.g. "ITF Women Dobrich, Bulgaria Women Singles". These are pulled out
+# once at ingestion with vectorized regex so later filters and rollups
+# work on typed columns instead of string scans.
+
+FIELD_COLUMNS = ["tour", "city", "country", "draw"]
+
+# Longest names first so "ATP Challenger" wins over "ATP"
+TOURS = [
+    "ATP Challenger", "WTA 125[Kk]?", "ITF Men", "ITF Women", "UTR PTT",
+    "ATP", "WTA", "ITF", "UTR",
+    "Wheelchairs", "Juniors", "Legends", "Exhibition"
+]
+
+# "Men Double" and draws glued to the next name ("Men DoublesUTR Wo") too
+DRAW_RE = (r"\s*,?\s*(?P<draw>(?:(?:Men|Women|Mixed|Boys|Girls),?\s+)?(?:Singles?|Doubles?))"
+           r"(?:[A-Z][^,]*)?$")
+# "Indianapolis, USA, Doubles Men Doubles": the draw word repeated
+STRAY_DRAW_RE = r",?\s*\b(?:Singles|Doubles)$"
+TOUR_RE = r"^(?:\d{4}\s+)?(?P<tour>" + "|".join(t.replace(" ", r"\s") for t in TOURS) + r")\b\s*"
+
+# "Dobrich, Bulgaria", "Wimbledon, London, GB"
+CITY_COUNTRY_RE = r"^(?:[^,]*,\s*)*?(?P<city>[^,]+?),\s*(?P<country>[^,]+?)$"
+# ITF week codes: "Slovakia 08A,", "Portugal F6", "GuatemalaF1"
+COUNTRY_WEEK_RE = r"^(?P<country>[^\d,]+?)\s*(?:F\d+[A-Z]?|\d+[A-Z]?)\s*,?$"
+# UTR series: "Buenos Aires Women 01", "Kawaguchi W01", "Carvoeiro Men +H 08"
+CITY_SERIES_RE = r"^(?P<city>.+?)\s+(?:(?:Men|Women)(?:\s+\+H)?\s+\d+|[MW]\d+)$"
+
+# "ITF Korea,Rep. 02A": the comma is part of the country
+COUNTRY_FIXES_RE = r"\bKorea,\s*Rep\b"
+
+# venues.csv country_name spellings, plus countries that only appear in
+# competition names. Anything else parsed as a country is stored as NULL.
+VENUE_COUNTRIES = {
+    "ARGENTINA", "AUSTRALIA", "AUSTRIA", "BAHRAIN", "BELGIUM", "BOLIVIA",
+    "BOSNIA & HERZEGOVINA", "BRAZIL", "BULGARIA", "CANADA", "CHILE", "CHINA",
+    "CHINESE TAIPEI", "COLOMBIA", "COTE D IVOIRE", "CROATIA", "CZECH REPUBLIC",
+    "DENMARK", "DOMINICAN REPUBLIC", "ECUADOR", "EGYPT", "ENGLAND", "FINLAND",
+    "FRANCE", "GEORGIA", "GERMANY", "GREECE", "HONG KONG, CHINA", "HUNGARY",
+    "INDIA", "ISRAEL", "ITALY", "JAPAN", "KAZAKHSTAN", "KOREA, REPUBLIC OF",
+    "LITHUANIA", "LUXEMBOURG", "MEXICO", "MOLDOVA, REPUBLIC OF", "MONACO",
+    "MOROCCO", "NETHERLANDS", "NEW CALEDONIA", "NEW ZEALAND", "NORTH MACEDONIA",
+    "PAKISTAN", "PARAGUAY", "PERU", "POLAND", "PORTUGAL", "QATAR", "ROMANIA",
+    "RUSSIAN FEDERATION", "SAN MARINO", "SAUDI ARABIA", "SCOTLAND", "SERBIA",
+    "SINGAPORE", "SLOVAKIA", "SLOVENIA", "SOUTH AFRICA", "SPAIN", "SWEDEN",
+    "SWITZERLAND", "THAILAND", "TUNISIA", "TURKEY", "UKRAINE",
+    "UNITED ARAB EMIRATES", "UNITED STATES", "URUGUAY", "UZBEKISTAN", "VIETNAM"
+}
+OTHER_COUNTRIES = {
+    "ALGERIA", "ANDORRA", "ANGOLA", "ARMENIA", "AZERBAIJAN", "BELARUS",
+    "BERMUDA", "BURUNDI", "CAMBODIA", "CAMEROON", "CONGO", "COSTA RICA",
+    "CYPRUS", "DJIBOUTI", "EL SALVADOR", "ESTONIA", "ETHIOPIA", "GABON",
+    "GHANA", "GUADELOUPE", "GUAM", "GUATEMALA", "HONDURAS", "INDONESIA",
+    "IRAN", "IRELAND", "JAMAICA", "KENYA", "KUWAIT", "LATVIA", "LEBANON",
+    "MALAYSIA", "MAURITIUS", "MONTENEGRO", "MOZAMBIQUE", "NIGERIA", "NORWAY",
+    "PANAMA", "PHILIPPINES", "PUERTO RICO", "RWANDA", "SENEGAL", "SRI LANKA",
+    "TRINIDAD & TOBAGO", "UGANDA", "VENEZUELA", "ZIMBABWE"
+}
+KNOWN_COUNTRIES = VENUE_COUNTRIES | OTHER_COUNTRIES
+
+# Competition spelling -> known spelling, compared casefolded
+COUNTRY_ALIASES = {
+    "usa": "united states",
+    "arg": "argentina",
+    "uae": "united arab emirates",
+    "great britain": "england",
+    "gb": "england",
+    "turkiye": "turkey",
+    "czechia": "czech republic",
+    "korea": "korea, republic of",
+    "south korea": "korea, republic of",
+    "korea republic": "korea, republic of",
+    "korea rep.": "korea, republic of",
+    "korea rep": "korea, republic of",
+    "republic of korea": "korea, republic of",
+    "russia": "russian federation",
+    "hong kong": "hong kong, china",
+    "moldova": "moldova, republic of",
+    "bosnia/herzegovina": "bosnia & herzegovina",
+    "bosnia and herzegovina": "bosnia & herzegovina",
+    "macedonia": "north macedonia",
+    "fyr macedonia": "north macedonia",
+    "trinidad and tobago": "trinidad & tobago",
+    "congo republic": "congo",
+    "republic of congo": "congo",
+    "kazahkstan": "kazakhstan",
+    "goergia": "georgia"
+}
+
+
+def parse_competition_names(names):
+    names = pd.Series(names, dtype="object").astype(str).str.strip()
+
+    draw = names.str.extract(DRAW_RE)["draw"]
+    body = (
+        names.str.replace(DRAW_RE, "", regex=True)
+        .str.replace(STRAY_DRAW_RE, "", regex=True)
+        .str.replace(COUNTRY_FIXES_RE, "Korea Rep", regex=True)
+    )
+
+    tour = body.str.extract(TOUR_RE)["tour"].str.replace(r"^WTA 125[Kk]?$", "WTA 125K", regex=True)
+    body = body.str.replace(TOUR_RE, "", regex=True).str.strip(" ,")
+
+    city_country = body.str.extract(CITY_COUNTRY_RE)
+    country_week = body.str.extract(COUNTRY_WEEK_RE)
+    city_series = body.str.extract(CITY_SERIES_RE)
+
+    # A UTR series code is not an ITF week code, so it never yields a country
+    country_week = country_week.where(city_series["city"].isna())
+
+    city = city_country["city"].combine_first(city_series["city"])
+    country = city_country["country"].combine_first(country_week["country"])
+
+    fields = pd.DataFrame({
+        "tour": tour,
+        "city": city.str.strip(),
+        "country": canonical_country(country),
+        "draw": draw.str.replace(",", "").str.replace(r"(Single|Double)$", r"\1s", regex=True).str.lower()
+    }, index=names.index)
+
+    return fields.where(fields.notna(), None)
+
+
+def add_competition_fields(competitions):
+    fields = parse_competition_names(competitions["competition_name"])
+    return competitions.drop(columns=FIELD_COLUMNS, errors="ignore").join(fields)
+
+
+def index_competition_fields(competitions):
+    # Categorical codes make the country/city groupbys integer groupbys
+    if "tour" not in competitions:
+        competitions = add_competition_fields(competitions)
+
+    competitions = competitions.copy()
+    # Versions published before countries were canonicalized
+    competitions["country"] = canonical_country(competitions["country"])
+    for col in FIELD_COLUMNS:
+        competitions[col] = competitions[col].astype("category")
+    return competitions
+
+
+# =========================
+# JOIN TO VENUES
+# =========================
+def country_key(values):
+    key = pd.Series(values, dtype="object").str.strip().str.casefold()
+    return key.replace(COUNTRY_ALIASES)
+
+
+def canonical_country(values):
+    # Stored in the venues.csv spelling ("USA" -> "UNITED STATES"), so the
+    # SQL join on country_name and every groupby agree without aliases.
+    # Leftover text ("TEXAS", "WOMEN") is not a country and becomes NULL.
+    country = country_key(values).str.upper()
+    return country.where(country.isin(KNOWN_COUNTRIES))
+
+
+def city_key(values):
+    return pd.Series(values, dtype="object").str.strip().str.casefold()
+
+
+def competition_venues(competitions, venues):
+    comps = pd.DataFrame({
+        "competition_id": competitions["competition_id"].to_numpy(),
+        "city_key": city_key(competitions["city"]).to_numpy(),
+        "country_key": country_key(competitions["country"]).to_numpy()
+    }).dropna(subset=["city_key"])
+
+    vens = pd.DataFrame({
+        "venue_id": venues["venue_id"].to_numpy(),
+        "city_key": city_key(venues["city_name"]).to_numpy(),
+        "country_key": country_key(venues["country_name"]).to_numpy()
+    })
+
+    return comps.merge(vens, on=["city_key", "country_key"], how="inner")[
+        ["competition_id", "venue_id"]
+    ]
+
+
+# =========================
+# ROLLUPS
+# =========================
+def country_rollup(competitions):
+    return (
+        competitions.groupby("country", observed=True)
+        .agg(
+            Competitions=("competition_id", "count"),
+            Cities=("city", "nunique"),
+            Tours=("tour", "nunique")
+        )
+        .reset_index()
+        .sort_values("Competitions", ascending=False)
+    )
+
+
+def city_rollup(competitions, venues):
+    pairs = competition_venues(competitions, venues)
+    venue_counts = pairs.groupby("competition_id")["venue_id"].nunique()
+
+    df = competitions.assign(
+        venues=competitions["competition_id"].map(venue_counts).fillna(0)
+    )
+
+    return (
+        df.dropna(subset=["city"])
+        .groupby(["country", "city"], observed=True)
+        .agg(
+            Competitions=("competition_id", "count"),
+            Venues=("venues", "max")
+        )
+        .reset_index()
+        .sort_values("Competitions", ascending=False)
+    )
@@ -3,6 +3,12 @@ import pandas as pd
 import os
 import time
 import json
+import random
+import email.utils
+from collections import defaultdict
+
+from competition_fields import add_competition_fields
+from player_bridge import build_player_tables
 
 # CONFIGURATION
 
@@ -20,35 +26,198 @@ os.makedirs(MOCK_DIR, exist_ok=True)
 
 HEADERS = {"accept": "application/json"}
 
-# API REQUEST FUNCTION (SAFE)
-
-def fetch_api_data(endpoint):
-    url = f"{BASE_URL}/{endpoint}"
-    params = {"api_key": API_KEY}
+# RETRY / CHECKPOINT CONFIGURATION
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+JOURNAL_PATH = os.path.join(CHECKPOINT_DIR, "journal.jsonl")
+CHECKPOINT_MAX_AGE = 24 * 60 * 60
+
+# CRAWL STATS
+
+CRAWL_STATS = defaultdict(lambda: {
+    "requests": 0,
+    "success": 0,
+    "retries": 0,
+    "failures": 0,
+    "resumed": 0,
+    "latency": []
+})
+
+def report_crawl_stats():
+    print("\n📊 CRAWL SUMMARY")
+    for endpoint, stats in CRAWL_STATS.items():
+        latency = sorted(stats["latency"])
+        p50 = latency[len(latency) // 2] if latency else 0
+        worst = latency[-1] if latency else 0
+        print(
+            f"  {endpoint} | Requests: {stats['requests']} | "
+            f"Success: {stats['success']} | Retries: {stats['retries']} | "
+            f"Failures: {stats['failures']} | Resumed: {stats['resumed']} | "
+            f"p50: {p50:.2f}s | Max: {worst:.2f}s"
+        )
 
-    response = requests.get(url, headers=HEADERS, params=params, timeout=15)
+# RETRY WITH BACKOFF
 
-    # Route not available (trial API limitation)
-    if response.status_code == 404:
+def retry_after_seconds(value):
+    # Retry-After is either delta-seconds or an HTTP date
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
         return None
+    return max(0.0, when.timestamp() - time.time())
 
-    if response.status_code != 200:
-        raise RuntimeError(
-            f"❌ API failed for {endpoint} | "
-            f"Status: {response.status_code} | Response: {response.text}"
-        )
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    # Full jitter: spread retries from many workers over the window
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+# API REQUEST FUNCTION (SAFE)
 
-    return response.json()
+def fetch_api_data(endpoint, params=None):
+    url = f"{BASE_URL}/{endpoint}"
+    params = {"api_key": API_KEY, **(params or {})}
+    stats = CRAWL_STATS[endpoint]
+
+    for attempt in range(MAX_RETRIES + 1):
+        stats["requests"] += 1
+        start = time.perf_counter()
+        retry_after = None
+
+        try:
+            response = requests.get(url, headers=HEADERS, params=params, timeout=15)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        else:
+            stats["latency"].append(time.perf_counter() - start)
+
+            # Route not available (trial API limitation)
+            if response.status_code == 404:
+                stats["success"] += 1
+                return None
+
+            if response.status_code == 200:
+                stats["success"] += 1
+                return response.json()
+
+            error = f"Status: {response.status_code} | Response: {response.text}"
+
+            if response.status_code not in RETRY_STATUSES:
+                stats["failures"] += 1
+                raise RuntimeError(f"❌ API failed for {endpoint} | {error}")
+
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+
+            # Waiting that long would hold the refresh lock for hours;
+            # fail now and let the checkpoint resume next run
+            if retry_after is not None and retry_after > BACKOFF_MAX:
+                stats["failures"] += 1
+                raise RuntimeError(
+                    f"❌ API failed for {endpoint} | Retry-After {retry_after:.0f}s "
+                    f"exceeds {BACKOFF_MAX:.0f}s | {error}"
+                )
+
+        if attempt == MAX_RETRIES:
+            break
+
+        delay = backoff_delay(attempt, retry_after)
+        stats["retries"] += 1
+        print(f"⚠ {endpoint} failed ({error}). Retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+    stats["failures"] += 1
+    raise RuntimeError(
+        f"❌ API failed for {endpoint} after {MAX_RETRIES} retries | {error}"
+    )
+
+# CHECKPOINT JOURNAL
+
+def _checkpoint_key(endpoint, page):
+    return f"{endpoint}#{page}"
+
+def _checkpoint_file(key):
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in key)
+    return os.path.join(CHECKPOINT_DIR, f"{safe}.json")
+
+def expire_checkpoints():
+    # Once per run, before any fetch: the endpoints fetch in parallel and
+    # would otherwise race to clear the same stale journal
+    try:
+        stale = time.time() - os.path.getmtime(JOURNAL_PATH) > CHECKPOINT_MAX_AGE
+    except FileNotFoundError:
+        return
+
+    if stale:
+        print("⚠ Checkpoint journal is stale. Starting a fresh crawl.")
+        clear_checkpoints()
+
+def load_journal():
+    if not os.path.exists(JOURNAL_PATH):
+        return {}
+
+    done = {}
+    with open(JOURNAL_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn last line from an interrupted write
+                continue
+            done[entry["key"]] = entry["file"]
+    return done
+
+def clear_checkpoints():
+    if os.path.isdir(CHECKPOINT_DIR):
+        for name in os.listdir(CHECKPOINT_DIR):
+            try:
+                os.remove(os.path.join(CHECKPOINT_DIR, name))
+            except FileNotFoundError:
+                pass
+
+def fetch_checkpointed(endpoint, page=0, params=None):
+    key = _checkpoint_key(endpoint, page)
+    journal = load_journal()
+
+    if key in journal and os.path.exists(journal[key]):
+        CRAWL_STATS[endpoint]["resumed"] += 1
+        with open(journal[key], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    data = fetch_api_data(endpoint, params)
+
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    path = _checkpoint_file(key)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+    # Payload first, journal entry second: a listed page is always complete
+    with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"key": key, "file": path}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    return data
 
 # COMPETITIONS & CATEGORIES
 
-def collect_competitions():
-    print("📥 Fetching Competitions Data...")
-    data = fetch_api_data("competitions.json")
+def fetch_competitions():
+    data = fetch_checkpointed("competitions.json")
 
     if not data or "competitions" not in data:
         raise RuntimeError("❌ Competitions data not available from API")
+    return data
 
+def parse_competitions(data):
     categories_map = {}
     competitions = []
 
@@ -72,18 +241,23 @@ def collect_competitions():
 
     return (
         pd.DataFrame(categories_map.values()),
-        pd.DataFrame(competitions)
+        add_competition_fields(pd.DataFrame(competitions))
     )
 
+def collect_competitions():
+    print("📥 Fetching Competitions Data...")
+    return parse_competitions(fetch_competitions())
+
 # COMPLEXES & VENUES
 
-def collect_complexes_and_venues():
-    print("📥 Fetching Complexes & Venues Data...")
-    data = fetch_api_data("complexes.json")
+def fetch_complexes():
+    data = fetch_checkpointed("complexes.json")
 
     if not data or "complexes" not in data:
         raise RuntimeError("❌ Complexes data not available from API")
+    return data
 
+def parse_complexes_and_venues(data):
     complexes = []
     venues = []
 
@@ -106,18 +280,22 @@ def collect_complexes_and_venues():
 
     return pd.DataFrame(complexes), pd.DataFrame(venues)
 
-# DOUBLES COMPETITOR RANKINGS (HYBRID)
+def collect_complexes_and_venues():
+    print("📥 Fetching Complexes & Venues Data...")
+    return parse_complexes_and_venues(fetch_complexes())
 
-def collect_doubles_rankings():
-    print("📥 Fetching Doubles Competitor Rankings...")
+# DOUBLES COMPETITOR RANKINGS (HYBRID)
 
-    data = fetch_api_data("doubles-competitor-rankings.json")
+def fetch_doubles_rankings():
+    data = fetch_checkpointed("doubles-competitor-rankings.json")
 
     if data is None:
         print("⚠ API route not available. Using mock doubles rankings data.")
         with open(os.path.join(MOCK_DIR, "doubles_rankings.json"), "r", encoding="utf-8") as f:
             data = json.load(f)
+    return data
 
+def parse_doubles_rankings(data):
     competitors = []
     rankings = []
 
@@ -142,6 +320,10 @@ def collect_doubles_rankings():
 
     return pd.DataFrame(competitors), pd.DataFrame(rankings)
 
+def collect_doubles_rankings():
+    print("📥 Fetching Doubles Competitor Rankings...")
+    return parse_doubles_rankings(fetch_doubles_rankings())
+
 # DATA CLEANING FUNCTION ✅ (FIXED)
 
 def clean_dataframe(df):
@@ -150,18 +332,22 @@ def clean_dataframe(df):
         df.fillna("NA", inplace=True)
     return df
 
-# MAIN EXECUTION
+# COLLECT ALL DATASETS
 
-def main():
-    print("\n🚀 STARTING STEP 3: DATA COLLECTION\n")
+def collect_datasets():
+    CRAWL_STATS.clear()
+    expire_checkpoints()
 
-    df_categories, df_competitions = collect_competitions()
-    time.sleep(1)
+    try:
+        df_categories, df_competitions = collect_competitions()
+        time.sleep(1)
 
-    df_complexes, df_venues = collect_complexes_and_venues()
-    time.sleep(1)
+        df_complexes, df_venues = collect_complexes_and_venues()
+        time.sleep(1)
 
-    df_competitors, df_rankings = collect_doubles_rankings()
+        df_competitors, df_rankings = collect_doubles_rankings()
+    finally:
+        report_crawl_stats()
 
     datasets = {
         "categories": df_categories,
@@ -172,8 +358,26 @@ def main():
         "rankings": df_rankings
     }
 
+    datasets = {name: clean_dataframe(df) for name, df in datasets.items()}
+
+    # Doubles teams split into players, with per-player aggregates
+    datasets["players"], datasets["team_players"] = build_player_tables(
+        datasets["competitors"], datasets["rankings"]
+    )
+
+    # Everything fetched: the next run starts a fresh crawl
+    clear_checkpoints()
+
+    return datasets
+
+# MAIN EXECUTION
+
+def main():
+    print("\n🚀 STARTING STEP 3: DATA COLLECTION\n")
+
+    datasets = collect_datasets()
+
     for name, df in datasets.items():
-        df = clean_dataframe(df)
         df.to_csv(os.path.join(DATA_DIR, f"{name}.csv"), index=False)
         print(f"✅ Saved {name}.csv | Rows: {len(df)}")
 
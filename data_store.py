@@ -0,0 +1,187 @@
+import os
+import shutil
+import time
+import uuid
+
+import pandas as pd
+
+import tennis_views as views
+from competition_fields import city_rollup, country_rollup, index_competition_fields
+from player_bridge import build_player_tables
+
+# =========================
+# VERSIONED DATA STORE
+# =========================
+# Every refresh is written to its own directory under data/versions/ and
+# only becomes visible once the CURRENT pointer is swapped with os.replace.
+# Readers resolve the pointer once per rerun, so a swap never shows them a
+# half-written dataset.
+
+DATA_DIR = os.getenv("TENNIS_DATA_DIR", "data")
+VERSIONS_DIR = os.path.join(DATA_DIR, "versions")
+CURRENT_POINTER = os.path.join(DATA_DIR, "CURRENT")
+
+# CSVs shipped with the repo, used until the first refresh is published
+BASELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+KEEP_VERSIONS = 3
+GC_GRACE_SECONDS = 600
+
+DATASET_FILES = {
+    "categories": "categories.csv",
+    "competitions": "competitions.csv",
+    "complexes": "complexes.csv",
+    "venues": "venues.csv",
+    "competitors": "competitors.csv",
+    "rankings": "competitor_rankings.csv",
+    "players": "players.csv",
+    "team_players": "team_players.csv"
+}
+
+# Precomputed by the pipeline; also the SQL table names
+AGGREGATE_FILES = {
+    "agg_country_summary": "agg_country_summary.csv",
+    "agg_category_counts": "agg_category_counts.csv",
+    "agg_country_rollup": "agg_country_rollup.csv",
+    "agg_city_rollup": "agg_city_rollup.csv"
+}
+
+# Table names used by tennis_sql_connector.py, parents before children
+SQL_TABLES = {
+    "categories": "Categories",
+    "competitions": "Competitions",
+    "complexes": "Complexes",
+    "venues": "Venues",
+    "competitors": "Competitors",
+    "rankings": "Competitor_Rankings",
+    "players": "Players",
+    "team_players": "Team_Players"
+}
+
+
+# -------------------------
+# READ SIDE
+# -------------------------
+def current_version():
+    try:
+        with open(CURRENT_POINTER, "r", encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+
+    if version and os.path.isdir(os.path.join(VERSIONS_DIR, version)):
+        return version
+    return None
+
+
+def version_dir(version):
+    if version is None:
+        return BASELINE_DIR
+    return os.path.join(VERSIONS_DIR, version)
+
+
+def build_aggregates(datasets):
+    # Country and category rollups served by the app, API and SQL dashboard
+    competitions = index_competition_fields(datasets["competitions"])
+    return {
+        "agg_country_summary": views.country_summary(
+            views.competitor_table(datasets["competitors"], datasets["rankings"])
+        ),
+        "agg_category_counts": views.category_counts(competitions, datasets["categories"]),
+        "agg_country_rollup": country_rollup(competitions),
+        "agg_city_rollup": city_rollup(competitions, datasets["venues"])
+    }
+
+
+def load_version(version):
+    folder = version_dir(version)
+    datasets = {}
+
+    for name, filename in {**DATASET_FILES, **AGGREGATE_FILES}.items():
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            datasets[name] = pd.read_csv(path)
+
+    # Older versions predate the parsed columns; parse them on load
+    if "competitions" in datasets:
+        datasets["competitions"] = index_competition_fields(datasets["competitions"])
+
+    # Same for versions published before the doubles player bridge
+    if "players" not in datasets and {"competitors", "rankings"} <= set(datasets):
+        datasets["players"], datasets["team_players"] = build_player_tables(
+            datasets["competitors"], datasets["rankings"]
+        )
+
+    # And before the pipeline materialized aggregates (the baseline CSVs)
+    if not set(AGGREGATE_FILES) <= set(datasets):
+        datasets.update(build_aggregates(datasets))
+
+    return datasets
+
+
+# -------------------------
+# WRITE SIDE
+# -------------------------
+def _new_version_id():
+    return time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+
+
+def publish_version(datasets, build_steps=()):
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+
+    version = _new_version_id()
+    staging = os.path.join(VERSIONS_DIR, f".tmp-{version}")
+    os.makedirs(staging)
+
+    try:
+        for name, df in datasets.items():
+            filename = DATASET_FILES.get(name, f"{name}.csv")
+            df.to_csv(os.path.join(staging, filename), index=False)
+
+        # Derived artifacts (e.g. search index) are built before the swap
+        for step in build_steps:
+            step(staging, datasets)
+
+        os.rename(staging, os.path.join(VERSIONS_DIR, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer_tmp = f"{CURRENT_POINTER}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, CURRENT_POINTER)
+
+    return version
+
+
+def garbage_collect(keep=KEEP_VERSIONS, grace_seconds=GC_GRACE_SECONDS):
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+
+    current = current_version()
+    now = time.time()
+    removed = []
+
+    # Version ids start with a timestamp, so name order is age order
+    versions = sorted(
+        (v for v in os.listdir(VERSIONS_DIR) if not v.startswith(".")),
+        reverse=True
+    )
+
+    for version in versions[keep:]:
+        path = os.path.join(VERSIONS_DIR, version)
+        if version == current or now - os.path.getmtime(path) < grace_seconds:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(version)
+
+    # Staging dirs left behind by a crashed refresh
+    for entry in os.listdir(VERSIONS_DIR):
+        path = os.path.join(VERSIONS_DIR, entry)
+        if entry.startswith(".tmp-") and now - os.path.getmtime(path) > grace_seconds:
+            shutil.rmtree(path, ignore_errors=True)
+
+    return removed
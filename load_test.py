@@ -0,0 +1,267 @@
+import argparse
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+import data_store
+
+# =========================
+# CONFIGURATION
+# =========================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+APPS = {
+    "csv": os.path.join(BASE_DIR, "tennis.py"),
+    "sql": os.path.join(BASE_DIR, "tennis_sql_connector.py")
+}
+
+RUN_TIMEOUT = 60
+NAV_LABEL = "📌 Navigate"
+ANY = object()
+
+# Primary keys from tennis_analysis .sql
+PRIMARY_KEYS = {
+    "categories": "category_id",
+    "competitions": "competition_id",
+    "complexes": "complex_id",
+    "venues": "venue_id",
+    "competitors": "competitor_id",
+    "players": "player_id",
+    "team_players": "competitor_id, player_id"
+}
+
+# Realistic analyst journeys: (action, widget label, value)
+SCENARIOS = {
+    "browse": [
+        ("page", NAV_LABEL, "🏠 Home Page"),
+        ("page", NAV_LABEL, "🏆 Leaderboards"),
+        ("page", NAV_LABEL, "🌍 Country Analysis")
+    ],
+    "competitor_search": [
+        ("page", NAV_LABEL, "🔍 Search Competitors"),
+        ("slider", "🏅 Rank Range", ANY),
+        ("select", "🌍 Country", ANY),
+        ("slider", "🏅 Rank Range", ANY)
+    ],
+    "player_lookup": [
+        ("page", NAV_LABEL, "🧑 Player Details"),
+        ("select", "🎾 Select Player", ANY),
+        ("select", "🎾 Select Player", ANY)
+    ],
+    "competition_search": [
+        ("page", NAV_LABEL, "🔎 Search Competitions"),
+        ("text", "🔤 Search competitions, venues and complexes", "itf"),
+        ("text", "🔤 Search competitions, venues and complexes", "itf women"),
+        ("select", "🎾 Type", ANY)
+    ],
+    "what_if": [
+        ("page", NAV_LABEL, "🔮 What-If Simulator"),
+        ("select", "🎾 Competitor", ANY),
+        ("select", "🎾 Competitor", ANY)
+    ]
+}
+
+
+# =========================
+# MEMORY
+# =========================
+def rss_bytes():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# =========================
+# LOCAL SQL BACKEND
+# =========================
+def scale_dataset(df, scale):
+    # Copy i gets "-i" on every id column, so keys stay unique and
+    # joins between scaled tables stay one-to-one
+    import pandas as pd
+
+    copies = [df]
+    for i in range(1, scale):
+        copy = df.copy()
+        for col in copy.columns:
+            if col.endswith("_id"):
+                copy[col] = copy[col].where(copy[col].isna(), copy[col].astype(str) + f"-{i}")
+        if "rank" in copy:
+            copy["rank"] = copy["rank"] + i * len(df)
+        copies.append(copy)
+
+    return pd.concat(copies, ignore_index=True)
+
+
+def seed_database(database_uri, scale=1):
+    from sqlalchemy import create_engine, types
+
+    engine = create_engine(database_uri)
+    datasets = data_store.load_version(data_store.current_version())
+
+    for name, table in data_store.SQL_TABLES.items():
+        df = scale_dataset(datasets[name], scale) if scale > 1 else datasets[name]
+
+        # VARCHAR (not TEXT) so the columns can carry keys and indexes
+        dtype = {col: types.String(100) for col in df.columns
+                 if not str(df[col].dtype).startswith(("int", "float"))}
+        df.to_sql(table, engine, if_exists="replace", index=False,
+                  dtype=dtype, chunksize=5000)
+
+        if name in PRIMARY_KEYS:
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD PRIMARY KEY ({PRIMARY_KEYS[name]})")
+
+        print(f"✅ Seeded {table} | Rows: {len(df)}")
+
+    engine.dispose()
+
+
+# =========================
+# SIMULATED SESSION
+# =========================
+def find_widget(at, kind, label):
+    widgets = {"page": at.selectbox, "select": at.selectbox,
+               "slider": at.slider, "text": at.text_input}[kind]
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    return None
+
+
+def pick_value(widget, kind, value, rng):
+    if value is not ANY:
+        return value
+    if kind == "slider":
+        low, high = sorted(rng.sample(range(int(widget.min), int(widget.max) + 1), 2)) \
+            if widget.max > widget.min else (widget.min, widget.max)
+        return (low, high)
+    return rng.choice(widget.options)
+
+
+class SessionResult:
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = []
+
+
+def run_session(app_path, scenario_names, iterations, think_seconds, seed, start_barrier):
+    rng = random.Random(seed)
+    result = SessionResult()
+    at = AppTest.from_file(app_path, default_timeout=RUN_TIMEOUT)
+
+    start_barrier.wait()
+
+    def rerun(step):
+        start = time.perf_counter()
+        step()
+        result.latencies.append(time.perf_counter() - start)
+        if at.exception:
+            result.errors.append(at.exception[0].message)
+
+    rerun(at.run)
+
+    for _ in range(iterations):
+        for name in scenario_names:
+            for kind, label, value in SCENARIOS[name]:
+                widget = find_widget(at, kind, label)
+                if widget is None:
+                    result.errors.append(f"{name}: widget '{label}' not found")
+                    continue
+
+                chosen = pick_value(widget, kind, value, rng)
+                rerun(lambda: widget.set_value(chosen).run())
+
+                if think_seconds:
+                    time.sleep(rng.uniform(0, think_seconds))
+
+    return result
+
+
+# =========================
+# LOAD TEST
+# =========================
+def load_test(app="csv", sessions=10, iterations=3, scenarios=None, think_seconds=0.0):
+    scenarios = scenarios or list(SCENARIOS)
+    app_path = APPS[app]
+
+    # Warm shared caches once, so the report measures steady-state reruns
+    AppTest.from_file(app_path, default_timeout=RUN_TIMEOUT).run()
+
+    rss_before = rss_bytes()
+    barrier = threading.Barrier(sessions)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [
+            pool.submit(run_session, app_path, scenarios, iterations,
+                        think_seconds, seed, barrier)
+            for seed in range(sessions)
+        ]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    rss_after = rss_bytes()
+
+    latencies = np.array([l for r in results for l in r.latencies]) * 1000
+    errors = [e for r in results for e in r.errors]
+
+    report = {
+        "app": app,
+        "sessions": sessions,
+        "reruns": int(latencies.size),
+        "seconds": round(elapsed, 2),
+        "reruns_per_second": round(latencies.size / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p90_ms": round(float(np.percentile(latencies, 90)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "max_ms": round(float(latencies.max()), 1),
+        "errors": len(errors),
+        "rss_before_mb": round(rss_before / 1e6, 1),
+        "rss_after_mb": round(rss_after / 1e6, 1),
+        "rss_per_session_mb": round((rss_after - rss_before) / 1e6 / sessions, 2)
+    }
+
+    print("\n📊 LOAD TEST SUMMARY")
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+    for message in sorted(set(errors))[:10]:
+        print(f"  ❌ {message}")
+
+    return report
+
+
+# =========================
+# RUN
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit apps")
+    parser.add_argument("--app", choices=sorted(APPS), default="csv")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="Max random think time between actions, in seconds")
+    parser.add_argument("--database-uri",
+                        help="Local database for the sql app (sets TENNIS_DATABASE_URI)")
+    parser.add_argument("--seed-db", action="store_true",
+                        help="Load the CSV datasets into --database-uri first")
+    parser.add_argument("--seed-scale", type=int, default=1,
+                        help="Repeat every table this many times when seeding")
+    args = parser.parse_args()
+
+    if args.database_uri:
+        os.environ["TENNIS_DATABASE_URI"] = args.database_uri
+        if args.seed_db:
+            seed_database(args.database_uri, args.seed_scale)
+
+    load_test(args.app, args.sessions, args.iterations, args.scenario, args.think)
@@ -0,0 +1,469 @@
+import argparse
+import functools
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import search_index
+from player_bridge import PLAYER_PREFIX, build_player_tables
+
+# =========================
+# STAGED PIPELINE
+# =========================
+# Named stages form a DAG: fetch per endpoint -> normalize -> validate ->
+# aggregates -> storage / database. Every stage output is cached under a
+# hash of its code, parameters and input fingerprints, so a stage whose
+# inputs did not change is read back instead of recomputed. Stages whose
+# inputs are ready run in parallel, so the three endpoint branches
+# (competitions, complexes, rankings) proceed independently.
+
+CACHE_DIR = os.path.join(data_store.DATA_DIR, "pipeline_cache")
+CACHE_KEEP = 3
+MAX_WORKERS = 4
+
+DATABASE_URI = os.getenv("TENNIS_DATABASE_URI")
+
+# Key column of every dataset, and (child, column, parent) references
+KEY_COLUMNS = {
+    "categories": "category_id",
+    "competitions": "competition_id",
+    "complexes": "complex_id",
+    "venues": "venue_id",
+    "competitors": "competitor_id",
+    "rankings": "competitor_id",
+    "players": "player_id"
+}
+
+REFERENCES = [
+    ("competitions", "category_id", "categories"),
+    ("venues", "complex_id", "complexes"),
+    ("rankings", "competitor_id", "competitors"),
+    ("team_players", "player_id", "players")
+]
+
+MISSING = "NA"
+
+
+class PipelineError(RuntimeError):
+    pass
+
+
+# =========================
+# FINGERPRINTS
+# =========================
+def _update_hash(h, value):
+    if isinstance(value, pd.DataFrame):
+        h.update(repr((list(value.columns), [str(t) for t in value.dtypes])).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            h.update(str(key).encode("utf-8"))
+            _update_hash(h, value[key])
+    else:
+        h.update(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+
+
+def fingerprint(value):
+    h = hashlib.sha256()
+    _update_hash(h, value)
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def module_fingerprint(module_name):
+    # Whole source file: constants and helpers count, not just one function.
+    # Found by spec, so data_collection is hashed without being imported.
+    spec = importlib.util.find_spec(module_name)
+    with open(spec.origin, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# =========================
+# STAGES
+# =========================
+class Stage:
+
+    def __init__(self, name, func, deps=(), params=None, cache=True, still_valid=None,
+                 code_deps=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.cache = cache
+        # Side-effect stages (storage, database) can veto a cached result;
+        # called with the cached output and the stage params
+        self.still_valid = still_valid
+        # Modules the stage calls into; editing any of them invalidates it
+        self.code_deps = tuple(code_deps)
+
+    def cache_key(self, input_fingerprints):
+        try:
+            code = inspect.getsource(self.func)
+        except (OSError, TypeError):
+            code = self.func.__qualname__
+
+        h = hashlib.sha256()
+        _update_hash(h, {
+            "stage": self.name,
+            "code": code,
+            "modules": {name: module_fingerprint(name) for name in (__name__,) + self.code_deps},
+            "params": self.params,
+            "inputs": list(input_fingerprints)
+        })
+        return h.hexdigest()
+
+
+class StageResult:
+
+    def __init__(self, name, status, seconds=0.0, output=None, fingerprint=None, error=None):
+        self.name = name
+        self.status = status
+        self.seconds = seconds
+        self.output = output
+        self.fingerprint = fingerprint
+        self.error = error
+
+
+# -------------------------
+# CACHE
+# -------------------------
+def _cache_path(stage_name, key):
+    return os.path.join(CACHE_DIR, stage_name, f"{key}.pkl")
+
+
+def read_cache(stage_name, key):
+    path = _cache_path(stage_name, key)
+    try:
+        with open(path, "rb") as f:
+            entry = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+    # Touch on hit, so pruning keeps the entries still in use
+    os.utime(path)
+    return entry
+
+
+def write_cache(stage_name, key, output, output_fingerprint):
+    path = _cache_path(stage_name, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump((output, output_fingerprint), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+    prune_cache(stage_name)
+
+
+def prune_cache(stage_name, keep=CACHE_KEEP):
+    folder = os.path.join(CACHE_DIR, stage_name)
+    entries = sorted(
+        (os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".pkl")),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    for path in entries[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# -------------------------
+# RUNNER
+# -------------------------
+def execute(stage, inputs, force=False):
+    start = time.perf_counter()
+
+    try:
+        key = stage.cache_key(r.fingerprint for r in inputs)
+
+        if stage.cache and not force:
+            entry = read_cache(stage.name, key)
+            if entry is not None and (stage.still_valid is None
+                                      or stage.still_valid(entry[0], **stage.params)):
+                return StageResult(stage.name, "cached", time.perf_counter() - start, *entry)
+
+        output = stage.func(*[r.output for r in inputs], **stage.params)
+        output_fingerprint = fingerprint(output)
+
+        if stage.cache:
+            write_cache(stage.name, key, output, output_fingerprint)
+
+        return StageResult(stage.name, "ran", time.perf_counter() - start,
+                           output, output_fingerprint)
+    except Exception as exc:
+        return StageResult(stage.name, "failed", time.perf_counter() - start, error=str(exc))
+
+
+def run_stages(stages, force=False, max_workers=MAX_WORKERS):
+    # Stages must be listed after their dependencies
+    seen = set()
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in seen]
+        if missing:
+            raise PipelineError(f"❌ Stage '{stage.name}' depends on unknown or later stages: {missing}")
+        seen.add(stage.name)
+
+    results = {}
+    pending = list(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for stage in list(pending):
+                if any(d not in results for d in stage.deps):
+                    continue
+                pending.remove(stage)
+
+                inputs = [results[d] for d in stage.deps]
+                if any(r.status in ("failed", "skipped") for r in inputs):
+                    results[stage.name] = StageResult(stage.name, "skipped")
+                    continue
+
+                running[pool.submit(execute, stage, inputs, force)] = stage
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                results[stage.name] = future.result()
+
+    return {stage.name: results[stage.name] for stage in stages}
+
+
+def report_summary(results, elapsed):
+    print("\n📊 PIPELINE SUMMARY")
+    width = max(len(name) for name in results)
+    icons = {"ran": "✅", "cached": "♻", "failed": "❌", "skipped": "⏭"}
+
+    for result in results.values():
+        line = f"  {icons[result.status]} {result.name:<{width}} | {result.status:<7} | {result.seconds:.2f}s"
+        if result.error:
+            line += f" | {result.error}"
+        print(line)
+
+    cacheable = [r for r in results.values() if r.status in ("ran", "cached")]
+    hits = sum(r.status == "cached" for r in cacheable)
+    print(f"  Cache hits: {hits}/{len(cacheable)} | Total: {elapsed:.2f}s")
+
+
+# =========================
+# STAGE FUNCTIONS
+# =========================
+def fetch_endpoint(fetcher):
+    # Imported lazily: data_collection requires SPORTRADAR_API_KEY
+    import data_collection
+    return getattr(data_collection, fetcher)()
+
+
+def normalize(raw, parser, names):
+    import data_collection
+
+    frames = getattr(data_collection, parser)(raw)
+    return {name: data_collection.clean_dataframe(df) for name, df in zip(names, frames)}
+
+
+def validate(frames):
+    problems = []
+
+    for name, df in frames.items():
+        key = KEY_COLUMNS.get(name)
+        if key is None:
+            continue
+        if df.empty:
+            problems.append(f"{name} is empty")
+        elif key not in df:
+            problems.append(f"{name} has no '{key}' column")
+        else:
+            if (df[key] == MISSING).any():
+                problems.append(f"{name} has rows without {key}")
+            if df[key].duplicated().any():
+                problems.append(f"{name} has {int(df[key].duplicated().sum())} duplicate {key} values")
+
+    if "players" in frames and not frames["players"].empty:
+        players = frames["players"]
+        blank = players["player_id"].str.removeprefix(PLAYER_PREFIX).str.strip("-") == ""
+        if blank.any():
+            problems.append(f"players has {int(blank.sum())} empty player_id values")
+        shared = players["player_name"].duplicated(keep=False)
+        if shared.any():
+            problems.append(f"players has {int(shared.sum())} names split across several player_id values")
+
+    for child, column, parent in REFERENCES:
+        if child in frames and parent in frames and column in frames[child]:
+            values = frames[child][column]
+            orphans = ~values.isin(frames[parent][KEY_COLUMNS[parent]]) & (values != MISSING)
+            if orphans.any():
+                problems.append(f"{child} has {int(orphans.sum())} {column} values missing from {parent}")
+
+    if problems:
+        raise PipelineError("❌ Validation failed: " + "; ".join(problems))
+    return frames
+
+
+def bridge_players(frames):
+    players, team_players = build_player_tables(frames["competitors"], frames["rankings"])
+    return {"players": players, "team_players": team_players}
+
+
+def _as_loaded(df):
+    # clean_dataframe writes missing values as "NA", which read_csv reads back as NaN
+    return df.replace(MISSING, np.nan)
+
+
+def materialize_aggregates(*branches):
+    datasets = {name: _as_loaded(df) for branch in branches for name, df in branch.items()}
+    return data_store.build_aggregates(datasets)
+
+
+def write_storage(*branches):
+    datasets = {name: df for branch in branches for name, df in branch.items()}
+    return data_store.publish_version(datasets, build_steps=[search_index.write_index])
+
+
+def _is_current(version):
+    return version == data_store.current_version()
+
+
+def _is_loaded(rows, database_uri):
+    # A wiped or reseeded database no longer has the rows this run loaded
+    from sqlalchemy import create_engine
+
+    engine = create_engine(database_uri)
+    try:
+        with engine.connect() as conn:
+            return all(
+                conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table}").scalar() == count
+                for table, count in rows.items()
+            )
+    except Exception:
+        return False
+    finally:
+        engine.dispose()
+
+
+def load_database(*branches, database_uri):
+    from sqlalchemy import create_engine, inspect as sql_inspect
+
+    *dataset_branches, aggregates = branches
+    datasets = {name: df for branch in dataset_branches for name, df in branch.items()}
+    engine = create_engine(database_uri)
+    rows = {}
+
+    # One transaction: readers see either the old rows or the new ones.
+    # Rows are replaced, not tables, so the schema's keys and indexes stay.
+    with engine.begin() as conn:
+        existing = set(sql_inspect(conn).get_table_names())
+        for name in reversed(list(data_store.SQL_TABLES)):
+            if data_store.SQL_TABLES[name] in existing:
+                conn.exec_driver_sql(f"DELETE FROM {data_store.SQL_TABLES[name]}")
+        for name, table in data_store.SQL_TABLES.items():
+            datasets[name].to_sql(table, conn, if_exists="append", index=False, chunksize=5000)
+            rows[table] = len(datasets[name])
+
+        for name, df in aggregates.items():
+            df.to_sql(name, conn, if_exists="replace", index=False)
+            rows[name] = len(df)
+
+    engine.dispose()
+    return rows
+
+
+# -------------------------
+# NIGHTLY DAG
+# -------------------------
+# (branch, fetcher, parser, datasets)
+BRANCHES = [
+    ("competitions", "fetch_competitions", "parse_competitions", ("categories", "competitions")),
+    ("complexes", "fetch_complexes", "parse_complexes_and_venues", ("complexes", "venues")),
+    ("rankings", "fetch_doubles_rankings", "parse_doubles_rankings", ("competitors", "rankings"))
+]
+
+
+def build_stages(database_uri=DATABASE_URI):
+    stages = []
+
+    for branch, fetcher, parser, names in BRANCHES:
+        # The API is the input here, so fetches always run; unchanged
+        # payloads then hit the cache from normalize onwards
+        stages.append(Stage(f"fetch_{branch}", fetch_endpoint,
+                            params={"fetcher": fetcher}, cache=False))
+        stages.append(Stage(f"normalize_{branch}", normalize, deps=[f"fetch_{branch}"],
+                            params={"parser": parser, "names": list(names)},
+                            code_deps=["data_collection", "competition_fields"]))
+        stages.append(Stage(f"validate_{branch}", validate, deps=[f"normalize_{branch}"]))
+
+    # Doubles teams -> individual players, off the rankings branch
+    stages.append(Stage("bridge_players", bridge_players, deps=["validate_rankings"],
+                        code_deps=["player_bridge"]))
+    stages.append(Stage("validate_players", validate, deps=["bridge_players"]))
+
+    validated = [f"validate_{branch}" for branch, *_ in BRANCHES] + ["validate_players"]
+    stages.append(Stage("materialize_aggregates", materialize_aggregates, deps=validated,
+                        code_deps=["data_store", "competition_fields", "tennis_views"]))
+    stages.append(Stage("write_storage", write_storage,
+                        deps=validated + ["materialize_aggregates"], still_valid=_is_current,
+                        code_deps=["data_store", "search_index", "competition_fields"]))
+
+    if database_uri:
+        stages.append(Stage("load_database", load_database,
+                            deps=validated + ["materialize_aggregates"],
+                            params={"database_uri": database_uri}, still_valid=_is_loaded,
+                            code_deps=["data_store"]))
+
+    return stages
+
+
+def run_pipeline(database_uri=DATABASE_URI, force=False, max_workers=MAX_WORKERS):
+    import data_collection
+
+    data_collection.CRAWL_STATS.clear()
+    data_collection.expire_checkpoints()
+    start = time.perf_counter()
+
+    try:
+        results = run_stages(build_stages(database_uri), force, max_workers)
+    finally:
+        data_collection.report_crawl_stats()
+
+    report_summary(results, time.perf_counter() - start)
+
+    if all(results[f"fetch_{branch}"].status == "ran" for branch, *_ in BRANCHES):
+        # Everything fetched: the next run starts a fresh crawl
+        data_collection.clear_checkpoints()
+
+    storage = results["write_storage"]
+    if storage.status not in ("ran", "cached"):
+        raise PipelineError(f"❌ Pipeline did not publish a version ({storage.status})")
+
+    return results
+
+
+# =========================
+# RUN
+# =========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Staged data pipeline with cached, parallel stages")
+    parser.add_argument("--database-uri", default=DATABASE_URI,
+                        help="Also load the datasets into this database (default: TENNIS_DATABASE_URI)")
+    parser.add_argument("--force", action="store_true", help="Ignore cached stage outputs")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    results = run_pipeline(args.database_uri, args.force, args.workers)
+    data_store.garbage_collect()
+    print(f"✅ Current data version {results['write_storage'].output}")
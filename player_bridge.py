@@ -0,0 +1,136 @@
+import hashlib
+
+import pandas as pd
+
+# =========================
+# DOUBLES PLAYER BRIDGE
+# =========================
+# A doubles team is one competitor named "Nikola Mektic / Mate Pavic".
+# At ingestion each team is split into individual players plus a
+# team <-> player bridge, and per-player aggregates are precomputed, so
+# "all teams for Mate Pavic" is an indexed lookup instead of a name scan.
+
+TEAM_SEPARATOR_RE = r"\s*/\s*"
+MISSING = "NA"
+PLAYER_PREFIX = "player:"
+
+PLAYER_COLUMNS = ["player_id", "player_name", "teams", "total_points",
+                  "best_rank", "countries", "country_count"]
+BRIDGE_COLUMNS = ["competitor_id", "player_id", "position"]
+
+
+def _unicode_key(name):
+    folded = " ".join(name.casefold().split())
+    return "u-" + hashlib.sha1(folded.encode("utf-8")).hexdigest()[:12]
+
+
+def player_key(names):
+    # Accents and case folded, so "Mektić" and "Mektic" are one player.
+    # Names with no Latin letters (e.g. "李娜") fold to nothing; they are
+    # keyed by a hash of the NFKC, case-folded name instead.
+    names = pd.Series(names, dtype="object").astype(str)
+    key = (
+        names.str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+        .str.casefold()
+        .str.replace(r"[^a-z0-9]+", "-", regex=True)
+        .str.strip("-")
+    )
+    empty = (key == "") & (names.str.strip() != "")
+    key[empty] = names[empty].str.normalize("NFKC").map(_unicode_key)
+    return PLAYER_PREFIX + key
+
+
+def _known(values):
+    return values.where(values.notna() & (values != MISSING))
+
+
+# =========================
+# INGESTION
+# =========================
+def split_teams(competitors):
+    names = competitors["name"].where(competitors["name"] != MISSING)
+    players = (
+        pd.DataFrame({"competitor_id": competitors["competitor_id"].to_numpy(),
+                      "player_name": names.to_numpy()})
+        .dropna(subset=["player_name"])
+    )
+    players["player_name"] = players["player_name"].str.split(TEAM_SEPARATOR_RE, regex=True)
+    players = players.explode("player_name", ignore_index=True)
+    players["player_name"] = players["player_name"].str.strip()
+    players = players[players["player_name"] != ""]
+
+    players["player_id"] = player_key(players["player_name"]).to_numpy()
+    players["position"] = players.groupby("competitor_id").cumcount() + 1
+    return players.drop_duplicates(["competitor_id", "player_id"])
+
+
+def build_player_tables(competitors, rankings):
+    bridge = split_teams(competitors)
+
+    teams = bridge.merge(
+        competitors[["competitor_id", "country"]], on="competitor_id", how="left"
+    ).merge(
+        rankings[["competitor_id", "rank", "points"]], on="competitor_id", how="left"
+    )
+    teams["country"] = _known(teams["country"])
+
+    players = (
+        teams.groupby("player_id")
+        .agg(
+            player_name=("player_name", "first"),
+            teams=("competitor_id", "nunique"),
+            total_points=("points", "sum"),
+            best_rank=("rank", "min"),
+            countries=("country", lambda c: "; ".join(sorted(c.dropna().unique()))),
+            country_count=("country", "nunique")
+        )
+        .reset_index()
+        .sort_values(["total_points", "player_id"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
+
+    return players[PLAYER_COLUMNS], bridge[BRIDGE_COLUMNS].reset_index(drop=True)
+
+
+# =========================
+# LOOKUPS
+# =========================
+class PlayerBridge:
+    # Sorted indexes both ways: player -> teams and team -> players
+
+    def __init__(self, players, team_players, competitors, rankings):
+        self.players = players.set_index("player_id", drop=False).sort_index()
+        self.by_player = team_players.set_index("player_id", drop=False).sort_index()
+        self.by_team = team_players.set_index("competitor_id", drop=False).sort_index()
+        self.teams = (
+            competitors.merge(rankings, on="competitor_id", how="left")
+            .set_index("competitor_id", drop=False)
+            .sort_index()
+        )
+        self.ids_by_name = dict(zip(self.players["player_name"], self.players["player_id"]))
+
+    def __contains__(self, player_id):
+        return player_id in self.players.index
+
+    def player(self, player_id):
+        return self.players.loc[player_id]
+
+    def player_teams(self, player_id):
+        team_ids = self.by_player.loc[[player_id], "competitor_id"].to_numpy()
+        teams = self.teams.loc[team_ids].reset_index(drop=True)
+
+        partners = self.by_team.loc[team_ids]
+        partners = partners[partners["player_id"] != player_id]
+        names = self.players.loc[partners["player_id"], "player_name"].to_numpy()
+        partner_names = pd.Series(names, index=partners["competitor_id"].to_numpy())
+
+        teams["partners"] = teams["competitor_id"].map(
+            partner_names.groupby(level=0).agg(" / ".join)
+        ).fillna("")
+        return teams.sort_values(["rank", "competitor_id"], kind="stable")
+
+    def team_players(self, competitor_id):
+        player_ids = self.by_team.loc[[competitor_id]].sort_values("position")["player_id"]
+        return self.players.loc[player_ids.to_numpy()].reset_index(drop=True)
@@ -0,0 +1,242 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# WHAT-IF RANKING SIMULATOR
+# =========================
+# Hypothetical point changes are applied to a scenario x competitor
+# matrix and every scenario is re-ranked in one batch. Columns are kept in
+# current-rank order, so ties go to the better current rank. Movement is
+# baseline rank minus new rank: positive means the competitor climbed.
+
+# Upper bound on scenario x competitor cells sorted in one argsort call
+BATCH_CELLS = 4_000_000
+
+
+class RankingTable:
+
+    def __init__(self, rankings, competitors=None):
+        df = rankings[["competitor_id", "rank", "points"] + (["name"] if "name" in rankings else [])]
+        if competitors is not None and "name" not in df:
+            df = df.merge(competitors[["competitor_id", "name"]], on="competitor_id", how="left")
+        self.frame = df.sort_values(["rank", "competitor_id"], kind="stable").reset_index(drop=True)
+
+        n = len(self.frame)
+        self.ids = self.frame["competitor_id"].to_numpy()
+        self.index = pd.Index(self.ids)
+        self.points = self.frame["points"].to_numpy(dtype=np.float64)
+
+        # Baseline: current points re-ranked with the same tie rule
+        self.order = np.argsort(-self.points, kind="stable")
+        self.base_rank = np.empty(n, dtype=np.int32)
+        self.base_rank[self.order] = np.arange(1, n + 1, dtype=np.int32)
+
+        # For insertion: points descending, and a strictly increasing key of
+        # (equal-points block, column) so ties resolve with one searchsorted
+        sorted_points = self.points[self.order]
+        new_block = np.r_[True, sorted_points[1:] != sorted_points[:-1]]
+        self._neg_sorted = -sorted_points
+        self._neg_blocks = -sorted_points[new_block]
+        self._tie_key = (np.cumsum(new_block) - 1) * (n + 1) + self.order
+
+    def __len__(self):
+        return len(self.ids)
+
+    def columns(self, competitor_ids):
+        cols = self.index.get_indexer(competitor_ids)
+        if (cols < 0).any():
+            missing = [c for c, i in zip(competitor_ids, cols) if i < 0]
+            raise ValueError(f"❌ Unknown competitor ids: {missing[:5]}")
+        return cols
+
+    def deltas(self, changes):
+        # changes: one {competitor_id: point change} dict per scenario
+        matrix = np.zeros((len(changes), len(self)), dtype=np.float64)
+        for s, change in enumerate(changes):
+            if change:
+                matrix[s, self.columns(list(change))] += list(change.values())
+        return matrix
+
+
+# =========================
+# RANKING KERNELS
+# =========================
+def rank_matrix(points):
+    # points: (scenarios, competitors) in current-rank column order
+    s, n = points.shape
+    order = np.argsort(-points, axis=1, kind="stable")
+    ranks = np.empty((s, n), dtype=np.int32)
+    ranks[np.arange(s)[:, None], order] = np.arange(1, n + 1, dtype=np.int32)
+    return ranks
+
+
+def insertion_ranks(table, cols, new_points):
+    # New rank of one changed competitor per scenario, without a sort:
+    # count everyone who now sits ahead of it in the baseline order
+    neg = -new_points
+    ahead = np.searchsorted(table._neg_sorted, neg, side="left")
+
+    # Equal points: only earlier columns stay ahead
+    block = np.searchsorted(table._neg_blocks, neg)
+    last = len(table._neg_blocks) - 1
+    tied = (block <= last) & (table._neg_blocks[np.minimum(block, last)] == neg)
+    tie_ahead = np.searchsorted(table._tie_key, block * (len(table) + 1) + cols)
+    ahead = np.where(tied, tie_ahead, ahead)
+
+    # The competitor's own baseline entry is counted if it used to be ahead
+    ahead -= table.points[cols] > new_points
+    return (ahead + 1).astype(np.int32)
+
+
+# =========================
+# SIMULATION
+# =========================
+class SimulationResult:
+
+    def __init__(self, table, points, ranks, seconds, changed=None):
+        self.table = table
+        self.points = points
+        self.ranks = ranks
+        self.seconds = seconds
+        # Column changed by each scenario (simulate_gains only)
+        self.changed = changed
+
+    @property
+    def movement(self):
+        return self.table.base_rank[None, :] - self.ranks
+
+    def __len__(self):
+        return self.ranks.shape[0]
+
+    def scenario_frame(self, scenario):
+        df = self.table.frame.copy()
+        df["baseline_rank"] = self.table.base_rank
+        df["new_points"] = self.points[scenario]
+        df["new_rank"] = self.ranks[scenario]
+        df["movement"] = df["baseline_rank"] - df["new_rank"]
+        return df.sort_values("new_rank")
+
+    def competitor_outcomes(self, competitor_id):
+        col = self.table.columns([competitor_id])[0]
+        return pd.DataFrame({
+            "scenario": np.arange(len(self)),
+            "new_points": self.points[:, col],
+            "new_rank": self.ranks[:, col],
+            "movement": self.table.base_rank[col] - self.ranks[:, col]
+        })
+
+    def landing_frame(self):
+        rows = np.arange(len(self))
+        df = self.table.frame.iloc[self.changed].reset_index(drop=True)
+        df["baseline_rank"] = self.table.base_rank[self.changed]
+        df["new_points"] = self.points[rows, self.changed]
+        df["new_rank"] = self.ranks[rows, self.changed]
+        df["movement"] = df["baseline_rank"] - df["new_rank"]
+        return df
+
+
+def simulate(table, deltas):
+    # deltas: (scenarios, competitors) point changes in table column order
+    start = time.perf_counter()
+    deltas = np.atleast_2d(np.asarray(deltas, dtype=np.float64))
+    if deltas.shape[1] != len(table):
+        raise ValueError(f"❌ Expected {len(table)} columns, got {deltas.shape[1]}")
+
+    points = table.points[None, :] + deltas
+    ranks = np.empty(points.shape, dtype=np.int32)
+
+    batch = max(1, BATCH_CELLS // max(1, len(table)))
+    for lo in range(0, len(points), batch):
+        ranks[lo:lo + batch] = rank_matrix(points[lo:lo + batch])
+
+    return SimulationResult(table, points, ranks, time.perf_counter() - start)
+
+
+def simulate_changes(table, changes):
+    return simulate(table, table.deltas(changes))
+
+
+def simulate_gains(table, competitor_ids, gains):
+    # One scenario per (competitor, gain): "if X wins this event".
+    # Sorted insertion plus a shift of the ranks it passes, O(scenarios x N).
+    start = time.perf_counter()
+    cols = table.columns(list(competitor_ids))
+    gains = np.broadcast_to(np.asarray(gains, dtype=np.float64), cols.shape)
+    rows = np.arange(len(cols))
+
+    new_points = table.points[cols] + gains
+    new_rank = insertion_ranks(table, cols, new_points)[:, None]
+    old_rank = table.base_rank[cols][:, None]
+
+    base = np.broadcast_to(table.base_rank, (len(cols), len(table)))
+    ranks = (
+        base
+        + ((base >= new_rank) & (base < old_rank))
+        - ((base > old_rank) & (base <= new_rank))
+    ).astype(np.int32)
+    ranks[rows, cols] = new_rank[:, 0]
+
+    points = np.repeat(table.points[None, :], len(cols), axis=0)
+    points[rows, cols] = new_points
+
+    return SimulationResult(table, points, ranks, time.perf_counter() - start, changed=cols)
+
+
+def landing_ranks(table, competitor_ids, gains):
+    # Just the landing rank of each changed competitor, no matrix
+    cols = table.columns(list(competitor_ids))
+    gains = np.broadcast_to(np.asarray(gains, dtype=np.float64), cols.shape)
+    new_rank = insertion_ranks(table, cols, table.points[cols] + gains)
+
+    return pd.DataFrame({
+        "competitor_id": table.ids[cols],
+        "baseline_rank": table.base_rank[cols],
+        "gain": gains,
+        "new_rank": new_rank,
+        "movement": table.base_rank[cols] - new_rank
+    })
+
+
+# =========================
+# RUN
+# =========================
+if __name__ == "__main__":
+    import data_store
+
+    parser = argparse.ArgumentParser(description="Benchmark the what-if ranking simulator")
+    parser.add_argument("--competitors", type=int, default=2000,
+                        help="Synthetic ranking list size (0: use the current data version)")
+    parser.add_argument("--scenarios", type=int, default=5000)
+    parser.add_argument("--changes", type=int, default=8,
+                        help="Competitors changed per scenario in the dense benchmark")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.competitors:
+        points = np.sort(rng.integers(0, 10000, args.competitors))[::-1]
+        rankings = pd.DataFrame({
+            "competitor_id": [f"sr:competitor:{i}" for i in range(args.competitors)],
+            "rank": np.arange(1, args.competitors + 1),
+            "points": points
+        })
+    else:
+        rankings = data_store.load_version(data_store.current_version())["rankings"]
+
+    table = RankingTable(rankings)
+    n = len(table)
+
+    cols = rng.integers(0, n, (args.scenarios, args.changes))
+    deltas = np.zeros((args.scenarios, n))
+    np.add.at(deltas, (np.arange(args.scenarios)[:, None], cols),
+              rng.choice([-500, 250, 500, 1000, 2000], cols.shape))
+    dense = simulate(table, deltas)
+
+    gains = simulate_gains(table, table.ids[rng.integers(0, n, args.scenarios)],
+                           rng.choice([250, 500, 1000, 2000], args.scenarios))
+
+    print(f"📊 {n} competitors x {args.scenarios} scenarios")
+    print(f"  Dense ({args.changes} changes/scenario): {dense.seconds * 1000:.1f} ms")
+    print(f"  Single gain (insertion): {gains.seconds * 1000:.1f} ms")
@@ -0,0 +1,145 @@
+import os
+import random
+import threading
+import time
+
+import data_store
+import pipeline
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# =========================
+# BACKGROUND REFRESH
+# =========================
+REFRESH_INTERVAL = int(os.getenv("TENNIS_REFRESH_SECONDS", str(6 * 60 * 60)))
+REFRESH_JITTER = 0.1
+
+LOCK_PATH = os.path.join(data_store.DATA_DIR, "refresh.lock")
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+# -------------------------
+# CROSS-REPLICA LOCK
+# -------------------------
+# The lock file is never removed. The OS lock on it is released when the
+# holder closes it or dies, so there is no stale lock to take over and no
+# way to release a lock held by another replica.
+def _acquire_lock():
+    os.makedirs(data_store.DATA_DIR, exist_ok=True)
+    f = open(LOCK_PATH, "a+")
+    f.seek(0)
+
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+
+    return f
+
+
+def _release_lock(f):
+    try:
+        f.seek(0)
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()
+
+
+def _current_version_age():
+    version = data_store.current_version()
+    if version is None:
+        return None
+    return time.time() - os.path.getmtime(data_store.version_dir(version))
+
+
+# -------------------------
+# ONE REFRESH
+# -------------------------
+def _is_fresh():
+    age = _current_version_age()
+    return age is not None and age < REFRESH_INTERVAL
+
+
+def refresh_once(force=False):
+    # Another replica may have published while we slept
+    if not force and _is_fresh():
+        return None
+
+    lock = _acquire_lock()
+    if lock is None:
+        print("⏭ Refresh already running on another worker, skipping")
+        return None
+
+    try:
+        # ...or between the check above and taking the lock
+        if not force and _is_fresh():
+            print("⏭ Data was refreshed by another worker, skipping")
+            return None
+
+        # Unchanged stages come from the pipeline cache, so a quiet night
+        # costs little more than the fetches
+        results = pipeline.run_pipeline()
+        version = results["write_storage"].output
+
+        if results["write_storage"].status == "cached":
+            # Same data as the current version: mark it fresh for the age check
+            os.utime(data_store.version_dir(version))
+
+        removed = data_store.garbage_collect()
+
+        print(f"✅ Published data version {version} | Removed: {len(removed)}")
+        return version
+    finally:
+        _release_lock(lock)
+
+
+# -------------------------
+# SCHEDULER THREAD
+# -------------------------
+class RefreshScheduler(threading.Thread):
+
+    def __init__(self, interval=REFRESH_INTERVAL):
+        super().__init__(name="tennis-refresh", daemon=True)
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def next_delay(self):
+        # Jitter keeps replicas started together from refreshing in lockstep
+        return self.interval * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+
+    def run(self):
+        while not self.stop_event.wait(self.next_delay()):
+            try:
+                refresh_once()
+            except Exception as exc:
+                print(f"❌ Background refresh failed: {exc}")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def start_scheduler(interval=REFRESH_INTERVAL):
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = RefreshScheduler(interval)
+            _scheduler.start()
+        return _scheduler
+
+
+if __name__ == "__main__":
+    refresh_once(force=True)
@@ -0,0 +1,199 @@
+import bisect
+import os
+import pickle
+import re
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+import data_store
+
+# =========================
+# FULL-TEXT SEARCH INDEX
+# =========================
+# Inverted index over competition names and venue/complex names, built
+# once per data version so lookups never scan the DataFrames.
+
+INDEX_FILE = "search_index.pkl"
+FILTER_FIELDS = ("doc_type", "type", "gender", "category_id")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return []
+    return TOKEN_RE.findall(str(text).casefold())
+
+
+# -------------------------
+# DOCUMENTS
+# -------------------------
+def build_documents(competitions, venues=None, complexes=None):
+    docs = [pd.DataFrame({
+        "doc_type": "competition",
+        "doc_id": competitions["competition_id"],
+        "name": competitions["competition_name"],
+        "text": competitions["competition_name"],
+        "type": competitions["type"],
+        "gender": competitions["gender"],
+        "category_id": competitions["category_id"]
+    })]
+
+    if complexes is not None:
+        docs.append(pd.DataFrame({
+            "doc_type": "complex",
+            "doc_id": complexes["complex_id"],
+            "name": complexes["complex_name"],
+            "text": complexes["complex_name"]
+        }))
+
+    if venues is not None:
+        v = venues
+        if complexes is not None:
+            v = v.merge(complexes, on="complex_id", how="left")
+        v = v.fillna("")
+        text = v["venue_name"].astype(str) + " " + v["city_name"].astype(str) + \
+            " " + v["country_name"].astype(str)
+        if "complex_name" in v:
+            text = text + " " + v["complex_name"].astype(str)
+
+        docs.append(pd.DataFrame({
+            "doc_type": "venue",
+            "doc_id": v["venue_id"],
+            "name": v["venue_name"].astype(str) + " (" + v["city_name"].astype(str) + ")",
+            "text": text
+        }))
+
+    return pd.concat(docs, ignore_index=True)
+
+
+# -------------------------
+# INDEX
+# -------------------------
+class SearchIndex:
+
+    def __init__(self, documents):
+        self.documents = documents.reset_index(drop=True)
+        self.n_docs = len(self.documents)
+
+        token_lists = [tokenize(t) for t in self.documents["text"]]
+        lengths = np.array([len(t) for t in token_lists], dtype=np.float32)
+        avg_len = lengths.mean() if self.n_docs else 1.0
+
+        raw = defaultdict(lambda: defaultdict(int))
+        for doc, tokens in enumerate(token_lists):
+            for token in tokens:
+                raw[token][doc] += 1
+
+        # Postings hold the BM25 term weight, so a query is a sum of lookups
+        self.postings = {}
+        for token, counts in raw.items():
+            doc_ids = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_ids] / avg_len)
+            idf = np.log(1 + (self.n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            weights = idf * tf * (BM25_K1 + 1) / (tf + norm)
+            self.postings[token] = (doc_ids, weights.astype(np.float32))
+
+        self.vocabulary = sorted(self.postings)
+
+        self.filters = {}
+        for field in FILTER_FIELDS:
+            if field not in self.documents:
+                continue
+            # Missing values (e.g. type on venue rows) become "" and never match
+            values = self.documents[field].astype(object).fillna("").astype(str).to_numpy()
+            self.filters[field] = {
+                value: values == value for value in pd.unique(values)
+            }
+
+    # -------------------------
+    # LOOKUP
+    # -------------------------
+    def expand_prefix(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\uffff")
+        return self.vocabulary[start:end]
+
+    def filter_values(self, field):
+        return sorted(v for v in self.filters.get(field, {}) if v)
+
+    def search_ids(self, query, limit=20, prefix=True, **filters):
+        terms = tokenize(query)
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        hits = np.zeros(self.n_docs, dtype=np.int16)
+
+        for i, term in enumerate(terms):
+            # Only the term being typed is treated as a prefix
+            if prefix and i == len(terms) - 1:
+                tokens = self.expand_prefix(term)
+            else:
+                tokens = [term] if term in self.postings else []
+
+            matched = np.zeros(self.n_docs, dtype=bool)
+            for token in tokens:
+                doc_ids, weights = self.postings[token]
+                scores[doc_ids] += weights
+                matched[doc_ids] = True
+            hits += matched
+
+        mask = hits == len(terms)
+        for field, value in filters.items():
+            if value in (None, "All"):
+                continue
+            mask &= self.filters.get(field, {}).get(str(value), np.zeros(self.n_docs, dtype=bool))
+
+        candidates = np.flatnonzero(mask)
+        if candidates.size > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return candidates, scores[candidates]
+
+    def results_frame(self, positions, scores):
+        return self.documents.iloc[positions].assign(score=scores)
+
+    def search(self, query, limit=20, prefix=True, **filters):
+        return self.results_frame(*self.search_ids(query, limit, prefix, **filters))
+
+    def timed_search(self, query, **kwargs):
+        # Times the index lookup only, not building the result DataFrame
+        start = time.perf_counter()
+        positions, scores = self.search_ids(query, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return self.results_frame(positions, scores), elapsed_ms
+
+
+# =========================
+# BUILD / LOAD PER VERSION
+# =========================
+def build_index(datasets):
+    return SearchIndex(build_documents(
+        datasets["competitions"],
+        datasets.get("venues"),
+        datasets.get("complexes")
+    ))
+
+
+def write_index(folder, datasets):
+    # Used as a data_store build step, so the index ships with the version
+    with open(os.path.join(folder, INDEX_FILE), "wb") as f:
+        pickle.dump(build_index(datasets), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_index(version, datasets=None):
+    path = os.path.join(data_store.version_dir(version), INDEX_FILE)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return build_index(datasets or data_store.load_version(version))
@@ -0,0 +1,147 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# SHARED READ-ONLY DATASETS
+# =========================
+# One SharedDatasets object per data version per process. Sessions get
+# the same DataFrames back (no pickling, no per-rerun copies), so the
+# frames are frozen and checked: any page that mutates them fails loudly
+# instead of silently changing what every other session sees.
+
+STRICT = os.getenv("TENNIS_STRICT_SHARED_DATA", "0") == "1"
+SESSION_IDLE_SECONDS = 30 * 60
+
+
+class SharedDataMutationError(RuntimeError):
+    pass
+
+
+def is_frozen(dtype):
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+def freeze(df):
+    # Numeric columns are rebuilt on read-only ndarrays, so in-place writes
+    # (df.loc[...] = x) raise ValueError. String, object and categorical
+    # columns cannot be made read-only; verify() hashes those on every rerun.
+    columns = {}
+    for col in df.columns:
+        if is_frozen(df[col].dtype):
+            arr = df[col].to_numpy(copy=True)
+            arr.flags.writeable = False
+            columns[col] = arr
+        else:
+            columns[col] = df[col]
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def unfrozen_columns(df):
+    return [col for col in df.columns if not is_frozen(df[col].dtype)]
+
+
+def structure(df):
+    return (
+        tuple(df.columns),
+        tuple(str(t) for t in df.dtypes),
+        df.shape,
+        id(df.index)
+    )
+
+
+def content_hash(df):
+    return int(pd.util.hash_pandas_object(df, index=True).to_numpy().sum())
+
+
+class SharedDatasets:
+
+    def __init__(self, version, datasets):
+        self.version = version
+        self._frames = {name: freeze(df) for name, df in datasets.items()}
+        self._structure = {name: structure(df) for name, df in self._frames.items()}
+        self._unfrozen = {name: unfrozen_columns(df) for name, df in self._frames.items()}
+        self._hashes = {name: self._hash(name) for name in self._frames}
+        self._full_hashes = {name: content_hash(df) for name, df in self._frames.items()}
+        self.nbytes = int(sum(
+            df.memory_usage(index=True, deep=True).sum() for df in self._frames.values()
+        ))
+
+    def __getitem__(self, name):
+        return self._frames[name]
+
+    def __contains__(self, name):
+        return name in self._frames
+
+    def get(self, name, default=None):
+        return self._frames.get(name, default)
+
+    @property
+    def datasets(self):
+        return dict(self._frames)
+
+    def _hash(self, name):
+        columns = self._unfrozen[name]
+        return content_hash(self._frames[name][columns]) if columns else 0
+
+    def verify(self, deep=STRICT):
+        # Structure check is O(columns). Columns that could not be frozen are
+        # always hashed (O(rows)); deep also re-hashes the read-only ones.
+        for name, df in self._frames.items():
+            if structure(df) != self._structure[name]:
+                raise SharedDataMutationError(
+                    f"❌ Shared dataset '{name}' was modified in place "
+                    f"(columns, dtypes or row order changed). Copy it before editing."
+                )
+            if self._hash(name) != self._hashes[name] or \
+                    (deep and content_hash(df) != self._full_hashes[name]):
+                raise SharedDataMutationError(
+                    f"❌ Shared dataset '{name}' values were modified in place. "
+                    f"Copy it before editing."
+                )
+
+
+# =========================
+# PER-SESSION MEMORY
+# =========================
+_session_bytes = {}
+_session_lock = threading.Lock()
+
+
+def object_nbytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum()) \
+            if isinstance(value, pd.DataFrame) else int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+def account_session(session_id, state):
+    # Only what the session holds on its own; shared frames are counted once
+    nbytes = sum(object_nbytes(v) for v in state.values())
+
+    with _session_lock:
+        _session_bytes[session_id] = (nbytes, time.time())
+        cutoff = time.time() - SESSION_IDLE_SECONDS
+        for sid in [s for s, (_, seen) in _session_bytes.items() if seen < cutoff]:
+            del _session_bytes[sid]
+
+    return nbytes
+
+
+def memory_report(shared):
+    with _session_lock:
+        sessions = {sid: nbytes for sid, (nbytes, _) in _session_bytes.items()}
+
+    return {
+        "version": shared.version,
+        "shared_bytes": shared.nbytes,
+        "sessions": len(sessions),
+        "session_bytes": sessions,
+        "total_session_bytes": sum(sessions.values())
+    }
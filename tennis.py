@@ -4,20 +4,81 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+import os
+
+import data_store
+import ranking_sim
+import refresh
+import search_index
+import tennis_views as views
+from player_bridge import PlayerBridge
+from shared_data import SharedDatasets, account_session, memory_report
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from chart_data import MAX_CHART_ROWS, top_n_with_other
+
+# Refuse to embed more than MAX_CHART_ROWS rows in any Vega-Lite spec
+alt.data_transformers.enable("default", max_rows=MAX_CHART_ROWS)
+
+# =========================
+# BACKGROUND REFRESH
+# =========================
+@st.cache_resource
+def start_background_refresh():
+    if os.getenv("SPORTRADAR_API_KEY"):
+        return refresh.start_scheduler()
+    return None
+
+start_background_refresh()
 
 # =========================
 # LOAD CSV DATA
 # =========================
-@st.cache_data
-def load_data():
-    competitors = pd.read_csv("competitors.csv")
-    rankings = pd.read_csv("competitor_rankings.csv")
-    competitions = pd.read_csv("competitions.csv")
-    categories = pd.read_csv("categories.csv")
-    venues = pd.read_csv("venues.csv")
-    return competitors, rankings, competitions, categories, venues
+# Keyed by data version: a published refresh is a new cache entry, and a
+# rerun that already resolved the old version finishes on it.
+# cache_resource hands every session the same read-only frames instead
+# of unpickling a fresh copy per rerun.
+@st.cache_resource(max_entries=data_store.KEEP_VERSIONS)
+def load_data(version):
+    datasets = data_store.load_version(version)
+    # The competitor/ranking join most pages read, built once per version
+    datasets["competitor_table"] = views.competitor_table(datasets["competitors"], datasets["rankings"])
+    return SharedDatasets(version, datasets)
+
+data_version = data_store.current_version()
+shared = load_data(data_version)
+
+competitors = shared["competitors"]
+rankings = shared["rankings"]
+competitions = shared["competitions"]
+categories = shared["categories"]
+venues = shared["venues"]
+competitor_table = shared["competitor_table"]
+
+@st.cache_resource(max_entries=data_store.KEEP_VERSIONS)
+def get_search_index(version):
+    return search_index.load_index(version, shared.datasets)
+
+@st.cache_resource(max_entries=data_store.KEEP_VERSIONS)
+def get_player_bridge(version):
+    return PlayerBridge(shared["players"], shared["team_players"], competitors, rankings)
+
+@st.cache_resource(max_entries=data_store.KEEP_VERSIONS)
+def get_ranking_table(version):
+    return ranking_sim.RankingTable(rankings, competitors)
 
-competitors, rankings, competitions, categories, venues = load_data()
+# =========================
+# CHART DATA (SERVER-SIDE)
+# =========================
+@st.cache_data(max_entries=32)
+def category_chart_data(version, top_n=10):
+    merged = competitions.merge(categories, on="category_id")
+    return top_n_with_other(
+        merged["category_name"],
+        n=top_n,
+        label_name="category_name",
+        value_name="Players"
+    )
 
 # =========================
 # PAGE CONFIG
@@ -40,7 +101,9 @@ page = st.sidebar.selectbox(
         "🔍 Search Competitors",
         "🧑 Player Details",
         "🌍 Country Analysis",
-        "🏆 Leaderboards"
+        "🏆 Leaderboards",
+        "🔎 Search Competitions",
+        "🔮 What-If Simulator"
     ]
 )
 
@@ -90,22 +153,19 @@ if page == "🏠 Home Page":
 
     st.subheader("📌 Top 3 Most Active Categories")
 
-    merged = competitions.merge(categories, on="category_id")
-    top_cat = merged.groupby("category_name").size().reset_index(name="Competitions") \
-                    .sort_values("Competitions", ascending=False).head(3)
+    top_cat = shared["agg_category_counts"].rename(columns={"Matches": "Competitions"}).head(3)
 
     st.dataframe(top_cat, use_container_width=True)
 
     st.subheader("🏅 Top 2 Players by Points")
 
-    top_players = competitors.merge(rankings, on="competitor_id") \
-                             .sort_values("points", ascending=False).head(10)
+    top_players = views.top_points(competitor_table, 10)
 
     st.dataframe(top_players[["name", "rank", "points"]], use_container_width=True)
 
     st.subheader("📊 Player Count by Category")
 
-    cat_players = merged.groupby("category_name").size().reset_index(name="Players")
+    cat_players = category_chart_data(data_version)
 
     chart = alt.Chart(cat_players).mark_bar().encode(
         x="category_name",
@@ -131,18 +191,13 @@ elif page == "🔍 Search Competitors":
     rank_range = st.slider("🏅 Rank Range", 1, int(rankings["rank"].max()), (1, 100))
     min_points = st.number_input("🔥 Minimum Points", value=0)
 
-    df = competitors.merge(rankings, on="competitor_id")
-
-    if selected_player != "All":
-        df = df[df["name"] == selected_player]
-
-    if selected_country != "All":
-        df = df[df["country"] == selected_country]
-
-    df = df[
-        (df["rank"].between(rank_range[0], rank_range[1])) &
-        (df["points"] >= min_points)
-    ]
+    df = views.search_competitors(
+        competitor_table,
+        player=selected_player,
+        country=selected_country,
+        rank_range=rank_range,
+        min_points=min_points
+    )
 
     st.dataframe(df[["name", "country", "rank", "points"]], use_container_width=True)
 
@@ -158,16 +213,11 @@ elif page == "🧑 Player Details":
         sorted(competitors["name"].unique())
     )
 
-    df = competitors.merge(
-        rankings,
-        on="competitor_id",
-        how="inner"
+    df = views.player_details(
+        competitor_table,
+        selected_name
     )
 
-    df = df[df["name"] == selected_name][
-        ["name", "country", "rank", "movement", "points", "competitions_played"]
-    ]
-
     df = df.rename(columns={
         "name": "Name",
         "country": "Country",
@@ -179,49 +229,73 @@ elif page == "🧑 Player Details":
 
     st.table(df)
 
+    st.subheader("🤝 Individual Player Partnerships")
+    bridge = get_player_bridge(data_version)
+
+    player_name = st.selectbox(
+        "🎾 Select Individual Player",
+        sorted(bridge.ids_by_name)
+    )
+    player_id = bridge.ids_by_name[player_name]
+    player = bridge.player(player_id)
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("🤝 Teams", int(player["teams"]))
+    c2.metric("📊 Total Points", int(player["total_points"]))
+    c3.metric("🏅 Best Rank", "-" if pd.isna(player["best_rank"]) else int(player["best_rank"]))
+    c4.metric("🌍 Countries", int(player["country_count"]))
+
+    st.table(
+        bridge.player_teams(player_id)[["name", "partners", "country", "rank", "points"]]
+        .rename(columns={
+            "name": "Team",
+            "partners": "Partners",
+            "country": "Country",
+            "rank": "Rank",
+            "points": "Points"
+        })
+    )
+
 # =========================
 # COUNTRY ANALYSIS
 # =========================
 elif page == "🌍 Country Analysis":
     st.title("🌍 Country-Wise Analysis")
 
-    df = competitors.merge(
-        rankings,
-        on="competitor_id",
-        how="inner"
-    )
-
-    summary = (
-        df.groupby("country")
-        .agg(
-            Competitors=("competitor_id", "count"),
-            AvgPoints=("points", "mean")
-        )
-        .reset_index()
-        .sort_values("Competitors", ascending=False)
-    )
+    summary = shared["agg_country_summary"]
 
     summary = summary.rename(columns={"country": "Country"})
     st.dataframe(summary, use_container_width=True)
+
+    country_comps = shared["agg_country_rollup"]
+    city_comps = shared["agg_city_rollup"]
+
+    st.subheader("🏟️ Competitions by Country")
+    st.dataframe(
+        country_comps.rename(columns={"country": "Country"}),
+        use_container_width=True
+    )
+
+    st.subheader("🏙️ Competitions by City")
+    st.dataframe(
+        city_comps.rename(columns={"country": "Country", "city": "City"}),
+        use_container_width=True
+    )
 # =========================
 # LEADERBOARDS
 # =========================
 elif page == "🏆 Leaderboards":
     st.title("🏆 Leaderboards")
 
-    df = competitors.merge(
-        rankings,
-        on="competitor_id",
-        how="inner"
-    )
+    df = competitor_table
 
     st.subheader("🥇 Top Ranked Competitors")
-    top_ranked = df.sort_values("rank").head(10)
+    top_ranked = views.top_ranked(df, 10)
     st.table(top_ranked[["name", "country", "rank"]]
              .rename(columns={"name": "Name", "country": "Country", "rank": "Rank"}))
 
     st.subheader("🔥 Highest Point Scorers")
-    top_points = df.sort_values("points", ascending=False).head(10)
+    top_points = views.top_points(df, 10)
     st.dataframe(
         top_points[["name", "country", "points"]]
         .rename(columns={"name": "Name", "country": "Country", "points": "Points"}),
@@ -229,18 +303,7 @@ elif page == "🏆 Leaderboards":
     )
 
     st.subheader("🎯 Categories with Highest Matches")
-    cat_df = competitions.merge(
-        categories,
-        on="category_id",
-        how="inner"
-    )
-
-    category_counts = (
-        cat_df.groupby("category_name")
-        .size()
-        .reset_index(name="Matches")
-        .sort_values("Matches", ascending=False)
-    )
+    category_counts = shared["agg_category_counts"]
 
     st.dataframe(
         category_counts.rename(columns={"category_name": "Category"}),
@@ -248,19 +311,131 @@ elif page == "🏆 Leaderboards":
     )
 
     st.subheader("🌍 Countries with Most Competitors")
-    country_counts = (
-        competitors.groupby("country")
-        .size()
-        .reset_index(name="Competitors")
-        .sort_values("Competitors", ascending=False)
-    )
+    country_counts = views.country_counts(competitors)
 
     st.dataframe(
         country_counts.rename(columns={"country": "Country"}),
         use_container_width=True
     )
 
+# =========================
+# SEARCH COMPETITIONS
+# =========================
+elif page == "🔎 Search Competitions":
+    st.title("🔎 Search Competitions")
+
+    index = get_search_index(data_version)
+
+    search_text = st.text_input(
+        "🔤 Search competitions, venues and complexes",
+        placeholder="e.g. ITF Men, Dobrich, Nacional"
+    )
+
+    def options(field):
+        return ["All"] + [v for v in index.filter_values(field) if v != "NA"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    doc_type = col1.selectbox("📂 Result Type", options("doc_type"))
+    comp_type = col2.selectbox("🎾 Type", options("type"))
+    gender = col3.selectbox("🚻 Gender", options("gender"))
+    category_names = dict(zip(categories["category_name"], categories["category_id"]))
+    category = col4.selectbox("🏷️ Category", ["All"] + sorted(category_names))
+    category_id = category_names.get(category, "All")
+
+    results, elapsed_ms = index.timed_search(
+        search_text,
+        limit=50,
+        doc_type=doc_type,
+        type=comp_type,
+        gender=gender,
+        category_id=category_id
+    )
+
+    st.caption(f"{len(results)} results in {elapsed_ms:.2f} ms")
+    st.dataframe(
+        results[["name", "doc_type", "type", "gender", "score"]]
+        .rename(columns={
+            "name": "Name",
+            "doc_type": "Result Type",
+            "type": "Type",
+            "gender": "Gender",
+            "score": "Score"
+        }),
+        use_container_width=True
+    )
+
+# =========================
+# WHAT-IF SIMULATOR
+# =========================
+elif page == "🔮 What-If Simulator":
+    st.title("🔮 What-If Simulator")
+
+    table = get_ranking_table(data_version)
+    ids_by_name = dict(zip(table.frame["name"], table.frame["competitor_id"]))
+
+    col1, col2 = st.columns(2)
+    selected_name = col1.selectbox("🎾 Competitor", list(ids_by_name))
+    gain = col2.number_input("➕ Points Gained", value=1000, step=250)
+    competitor_id = ids_by_name[selected_name]
+
+    result = ranking_sim.simulate_gains(table, [competitor_id], [gain])
+    landing = result.landing_frame().iloc[0]
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("🏅 Current Rank", int(landing["baseline_rank"]))
+    c2.metric("🎯 New Rank", int(landing["new_rank"]), delta=int(landing["movement"]))
+    c3.metric("📊 New Points", int(landing["new_points"]))
+
+    st.subheader("↕️ Ranking Changes")
+    scenario = result.scenario_frame(0)
+    st.dataframe(
+        scenario[scenario["movement"] != 0][["name", "baseline_rank", "new_rank", "movement", "new_points"]]
+        .rename(columns={
+            "name": "Name",
+            "baseline_rank": "Current Rank",
+            "new_rank": "New Rank",
+            "movement": "Movement",
+            "new_points": "Points"
+        }),
+        use_container_width=True
+    )
 
+    st.subheader("🏆 If Each Top Competitor Gained These Points")
+    top_n = st.number_input("🔢 Top Competitors", min_value=1, max_value=len(table),
+                            value=min(50, len(table)))
+    batch = ranking_sim.simulate_gains(table, table.ids[table.order[:top_n]], gain)
 
+    st.caption(f"{len(batch)} scenarios x {len(table)} competitors in {batch.seconds * 1000:.2f} ms")
+    st.dataframe(
+        batch.landing_frame()[["name", "baseline_rank", "new_rank", "movement"]]
+        .rename(columns={
+            "name": "Name",
+            "baseline_rank": "Current Rank",
+            "new_rank": "New Rank",
+            "movement": "Movement"
+        }),
+        use_container_width=True
+    )
 
+# =========================
+# SHARED DATA GUARD
+# =========================
+# Raises if this rerun modified the shared frames in place
+shared.verify()
 
+# =========================
+# MEMORY
+# =========================
+ctx = get_script_run_ctx()
+if ctx is not None:
+    session_bytes = account_session(ctx.session_id, st.session_state.to_dict())
+else:
+    session_bytes = 0
+
+report = memory_report(shared)
+
+with st.sidebar.expander("🧠 Memory"):
+    st.caption(f"Data version: {report['version'] or 'baseline'}")
+    st.metric("📦 Shared Datasets (MB)", round(report["shared_bytes"] / 1e6, 2))
+    st.metric("🧑 This Session (KB)", round(session_bytes / 1e3, 1))
+    st.metric("👥 Active Sessions", report["sessions"])
@@ -69,6 +69,17 @@ SELECT gender, COUNT(*)
 FROM competitions 
 GROUP BY gender;
 
+-- Fields parsed from competition_name at ingestion (competition_fields.py)
+ALTER TABLE competitions
+    ADD COLUMN tour VARCHAR(50),
+    ADD COLUMN city VARCHAR(100),
+    ADD COLUMN country VARCHAR(100),
+    ADD COLUMN draw VARCHAR(20);
+
+CREATE INDEX idx_competitions_country_city ON competitions (country, city);
+CREATE INDEX idx_competitions_tour ON competitions (tour);
+CREATE INDEX idx_competitions_draw ON competitions (draw);
+
 CREATE TABLE complexes (
     complex_id VARCHAR(50) PRIMARY KEY,
     complex_name VARCHAR(100) NOT NULL
@@ -155,6 +166,9 @@ SELECT complex_id, COUNT(*)
 FROM venues
 GROUP BY complex_id;
 
+-- Joins competitions to venues on the parsed city/country
+CREATE INDEX idx_venues_country_city ON venues (country_name, city_name);
+
 CREATE TABLE competitors (
     competitor_id VARCHAR(50) PRIMARY KEY,
     name VARCHAR(100),
@@ -200,6 +214,38 @@ CREATE TABLE rankings (
     FOREIGN KEY (competitor_id) REFERENCES competitors(competitor_id)
 );
 
+-- Doubles teams split into individual players (player_bridge.py)
+CREATE TABLE players (
+    player_id VARCHAR(100) PRIMARY KEY,
+    player_name VARCHAR(100),
+    teams INT,
+    total_points INT,
+    best_rank INT,
+    countries VARCHAR(255),
+    country_count INT
+);
+CREATE INDEX idx_players_name ON players (player_name);
+
+CREATE TABLE team_players (
+    competitor_id VARCHAR(50),
+    player_id VARCHAR(100),
+    position INT,
+    PRIMARY KEY (competitor_id, player_id),
+    FOREIGN KEY (competitor_id) REFERENCES competitors(competitor_id),
+    FOREIGN KEY (player_id) REFERENCES players(player_id)
+);
+-- Player -> teams direction of the bridge
+CREATE INDEX idx_team_players_player ON team_players (player_id, competitor_id);
+
+-- All teams and points for one player
+SELECT c.name, r.rank, r.points
+FROM players p
+JOIN team_players tp ON tp.player_id = p.player_id
+JOIN competitors c ON c.competitor_id = tp.competitor_id
+JOIN rankings r ON r.competitor_id = tp.competitor_id
+WHERE p.player_name = 'Mate Pavic'
+ORDER BY r.rank;
+
 -- 2. DATA CLEANING & ANALYTICAL QUERIES
 SELECT COUNT(*) FROM categories;
 SELECT COUNT(*) FROM competitions;
@@ -0,0 +1,96 @@
+# =========================
+# DATASET VIEWS
+# =========================
+# Leaderboards, country stats and competitor lookups over the CSV
+# datasets. Shared by the Streamlit dashboard (tennis.py) and the JSON
+# API (api.py) so both always compute the same answers.
+
+
+def competitor_table(competitors, rankings):
+    return competitors.merge(rankings, on="competitor_id", how="inner")
+
+
+# -------------------------
+# COMPETITOR LOOKUPS
+# -------------------------
+def search_competitors(df, player="All", country="All", rank_range=None, min_points=0):
+    if player != "All":
+        df = df[df["name"] == player]
+
+    if country != "All":
+        df = df[df["country"] == country]
+
+    mask = df["points"] >= min_points
+    if rank_range is not None:
+        mask &= df["rank"].between(rank_range[0], rank_range[1])
+
+    return df[mask]
+
+
+def player_details(df, name):
+    return df[df["name"] == name][
+        ["name", "country", "rank", "movement", "points", "competitions_played"]
+    ]
+
+
+# -------------------------
+# LEADERBOARDS
+# -------------------------
+# competitor_id breaks ties so the order is total (needed for keyset paging)
+RANKED_ORDER = (["rank", "competitor_id"], [True, True])
+POINTS_ORDER = (["points", "competitor_id"], [False, True])
+
+
+def ranked_order(df):
+    return df.sort_values(RANKED_ORDER[0], ascending=RANKED_ORDER[1], kind="stable")
+
+
+def points_order(df):
+    return df.sort_values(POINTS_ORDER[0], ascending=POINTS_ORDER[1], kind="stable")
+
+
+def top_ranked(df, n=10):
+    return ranked_order(df).head(n)
+
+
+def top_points(df, n=10):
+    return points_order(df).head(n)
+
+
+# -------------------------
+# AGGREGATES
+# -------------------------
+def country_summary(df):
+    return (
+        df.groupby("country")
+        .agg(
+            Competitors=("competitor_id", "count"),
+            AvgPoints=("points", "mean")
+        )
+        .reset_index()
+        .sort_values("Competitors", ascending=False)
+    )
+
+
+def category_counts(competitions, categories, column="Matches"):
+    cat_df = competitions.merge(
+        categories,
+        on="category_id",
+        how="inner"
+    )
+
+    return (
+        cat_df.groupby("category_name")
+        .size()
+        .reset_index(name=column)
+        .sort_values(column, ascending=False)
+    )
+
+
+def country_counts(competitors):
+    return (
+        competitors.groupby("country")
+        .size()
+        .reset_index(name="Competitors")
+        .sort_values("Competitors", ascending=False)
+    )